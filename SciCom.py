@@ -13,22 +13,43 @@ from config import (
     CITATION_DIR,
     KEYWORDS_CSV,
     ABBREVS_CSV,
+    MAX_WORKERS,
+    USE_ASYNC_PIPELINE,
+    TAG_ENGINE,
 )
 
 from db_utils import connect_to_mongo, init_db, get_last_successful_run_date
-from pubmed_utils import search_pubmed_date_range, fetch_pubmed_details
-from pdf_utils import attempt_pdf_download
-from abbrev_utils import compute_updated_title
+from pubmed_utils import fetch_pubmed_details
+from pipeline import run_pipeline
+from oa_utils import clear_oa_cache
+from cpu_pool import run_cpu, get_cpu_pool, shutdown_cpu_pool
+from pdf_sandbox import shutdown_sandbox
+from mongo_client import command_stats, close_clients
+from bulk_writer import BulkWriter
+from db_migrations import MigrationError
+from tag_utils import tag_timings
+from tfidf_tags import update_from_db
+from article_stages import (
+    fetch_keyword,
+    refresh_article,
+    record_error,
+    prepare_article,
+    resolve_pdf,
+    extract_text_logged,
+    lookup_text,
+    store_text,
+    tag_article,
+    tag_articles,
+    persist_article,
+)
 from utils import (
-    sanitize_filename,
     generate_citation,
     load_keywords_from_csv,
     load_abbreviation_map,
 )
-from pdf_text_utils import extract_pdf_text
-from tag_utils import suggest_tags
 
 import os
+import asyncio
 from datetime import datetime, timedelta
 import concurrent.futures
 import pandas as pd
@@ -37,9 +58,25 @@ import pandas as pd
 # ----------------------------------------------------------------------
 # Top-level extraction routine
 # ----------------------------------------------------------------------
-def run_extraction(use_parallel: bool = False) -> None:
-    """Main runner; see module docstring."""
-    db = init_db()
+def run_extraction(use_parallel: bool = False,
+                   use_async: bool = USE_ASYNC_PIPELINE) -> None:
+    """
+    Main runner; see module docstring. use_parallel processes each batch on
+    a thread pool; use_async runs the stage-per-coroutine engine in
+    pipeline.py instead of the keyword loop below.
+    """
+    try:
+        db = init_db()
+    except MigrationError as e:                 # e.g. duplicate PMIDs block a unique index
+        db = connect_to_mongo()
+        run_log_id = db["run_logs"].insert_one({
+            "start_time": datetime.now(),
+            "status": "started",
+            "articles_processed": 0,
+            "errors": [{"stage": "migrations", "error": str(e), "timestamp": datetime.now()}]
+        }).inserted_id
+        _handle_run_error(e, db, run_log_id)
+        return
 
     # guarantee the PDF folder exists  (Update 1)
     os.makedirs(PDF_DIR, exist_ok=True)
@@ -50,6 +87,9 @@ def run_extraction(use_parallel: bool = False) -> None:
         print("❌  No keywords found in keywords.csv. Exiting.")
         return
     abbr_map = load_abbreviation_map()
+    clear_oa_cache()
+    tag_timings.reset()
+    command_stats.reset()
 
     # ---------- run-log (unchanged) ----------
     start_time = datetime.now()
@@ -65,40 +105,32 @@ def run_extraction(use_parallel: bool = False) -> None:
     total_articles_processed = 0
     paid_citations, paid_seen = [], set()
     export_rows = []                                    # Update 2
+    writer = BulkWriter(db)                             # articles + article_text writes
 
     try:
         last_successful = get_last_successful_run_date(db)
         start_date = last_successful if last_successful else datetime.now() - timedelta(days=30)
         end_date   = datetime.now()
 
-        # ---------- keyword loop ----------
-        for kw in keywords:
-            print(f"\n🔍  Keyword: {kw}")
-            ids = search_pubmed_date_range(kw, start_date, end_date)
-            if not ids:
-                print("   (no new articles)")
-                continue
-            print(f"➡️  Found {len(ids)} articles")
-
-            if use_parallel:
-                with concurrent.futures.ThreadPoolExecutor(max_workers=5) as ex:
-                    futures = [
-                        ex.submit(process_pubmed_id, pid, db, abbr_map, run_log_id)
-                        for pid in ids
-                    ]
-                    for fut in concurrent.futures.as_completed(futures):
-                        res = fut.result()
-                        if res and not res.get("skipped"):
-                            export_rows.append(res)      # Update 2
-                            total_articles_processed += 1
-                            _maybe_collect_paid(res, paid_seen, paid_citations, db)
-            else:
-                for pid in ids:
-                    res = process_pubmed_id(pid, db, abbr_map, run_log_id)
-                    if res and not res.get("skipped"):
-                        export_rows.append(res)          # Update 2
-                        total_articles_processed += 1
-                        _maybe_collect_paid(res, paid_seen, paid_citations, db)
+        # ---------- keyword loop / async stage engine ----------
+        if use_async:
+            results = asyncio.run(run_pipeline(
+                keywords, start_date, end_date, db, abbr_map, run_log_id, writer))
+        else:
+            results = _run_keywords(keywords, start_date, end_date,
+                                    db, abbr_map, run_log_id, use_parallel, writer)
+
+        for res in results:
+            if res and not res.get("skipped"):
+                export_rows.append(res)                  # Update 2
+                total_articles_processed += 1
+                _maybe_collect_paid(res, paid_seen, paid_citations)
+        writer.flush()
+
+        # ---------- grow the TF-IDF corpus with this run's articles ----------
+        if TAG_ENGINE == "tfidf" and export_rows:
+            added = update_from_db(db, [r["pubmed_id"] for r in export_rows])
+            print(f"🏷️  TF-IDF model: {added} new documents")
 
         # ---------- single write of all citations (Update 4) ----------
         _write_all_citations(paid_citations)
@@ -108,88 +140,164 @@ def run_extraction(use_parallel: bool = False) -> None:
 
         # ---------- mark run complete ----------
         end_time = datetime.now()
+        tagging = tag_timings.summary()
         db["run_logs"].update_one(
             {"_id": run_log_id},
             {"$set": {
                 "end_time": end_time,
                 "status": "completed",
-                "articles_processed": total_articles_processed
+                "articles_processed": total_articles_processed,
+                "tagging": tagging,
+                "mongo": command_stats.summary()
             }}
         )
         print(f"\n✅  Run finished at {end_time:%Y-%m-%d %H:%M:%S}  "
               f"({total_articles_processed} articles processed)")
+        _print_tag_timings(tagging, (end_time - start_time).total_seconds())
 
     except Exception as e:
         _handle_run_error(e, db, run_log_id)
+    finally:
+        _close_writer(writer, db, run_log_id)
+        shutdown_cpu_pool()
+        shutdown_sandbox()
+        close_clients()
+
+
+# ----------------------------------------------------------------------
+# Keyword loop (serial / thread pool)
+# ----------------------------------------------------------------------
+def _run_keywords(keywords, start_date, end_date, db, abbr_map, run_log_id,
+                  use_parallel, writer=None):
+    """Yield per-article results for every hit of every keyword."""
+    for kw in keywords:
+        print(f"\n🔍  Keyword: {kw}")
+        if writer is not None:
+            writer.flush()              # earlier keywords' articles now count as known
+        known, batches = fetch_keyword(db, kw, start_date, end_date)
+        if batches is None:
+            print("   (no new articles)")
+            continue
+
+        for doc in known:
+            yield refresh_article(db, doc, writer)
+        for batch in batches:
+            yield from _process_batch(batch, db, abbr_map, run_log_id, use_parallel, writer)
+
+
+def _process_batch(batch, db, abbr_map, run_log_id, use_parallel, writer=None):
+    """
+    Yield results for one batch of work items (fetch_keyword): fetch PDFs and text per
+    article (on a thread pool with use_parallel), tag the whole batch in a
+    single tag_articles call, then persist.
+    """
+    if use_parallel:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+            futures = [
+                ex.submit(_prepare_pubmed_id, it["details"]["pubmed_id"], db, abbr_map,
+                          run_log_id, it["details"], True, writer, existing=it["existing"])
+                for it in batch
+            ]
+            items = [fut.result() for fut in concurrent.futures.as_completed(futures)]
+    else:
+        items = [_prepare_pubmed_id(it["details"]["pubmed_id"], db, abbr_map, run_log_id,
+                                    it["details"], writer=writer, existing=it["existing"])
+                 for it in batch]
+
+    ready = [item for item in items if not item.get("skipped")]
+    yield from (item for item in items if item.get("skipped"))
+    tags = tag_articles([(it["details"], it["full_text"], it["existing"]) for it in ready],
+                        executor=get_cpu_pool)      # pool started only if the batch fans out
+    for item, item_tags in zip(ready, tags):
+        yield _finish_pubmed_id(db, item, item_tags, writer)
 
 
 # ----------------------------------------------------------------------
 # Process one PubMed ID  (unchanged logic + Update 3)
 # ----------------------------------------------------------------------
-def process_pubmed_id(pid: str, db, abbr_map: dict, run_log_id):
-    details = fetch_pubmed_details(pid)
+def process_pubmed_id(pid: str, db, abbr_map: dict, run_log_id, details=None,
+                      offload_cpu: bool = False, writer=None):
+    # offload_cpu: run extraction/tagging in the cpu_pool processes (threaded path)
+    # writer: BulkWriter to queue the Mongo writes on (direct writes when None)
+    item = _prepare_pubmed_id(pid, db, abbr_map, run_log_id, details, offload_cpu, writer)
+    if item.get("skipped"):
+        return item
+
+    # ------- tagging & enrichment -------
+    tags = tag_article(item["details"], item["full_text"], item["existing"],
+                       run_cpu if offload_cpu else None)
+    return _finish_pubmed_id(db, item, tags, writer)
+
+
+def _prepare_pubmed_id(pid, db, abbr_map, run_log_id, details=None, offload_cpu=False,
+                       writer=None, **prefetched):
+    """
+    Everything before tagging; returns the work item or a skipped result.
+    `existing=` passes the stored doc prefetched by fetch_keyword.
+    """
+    # details come pre-fetched (batched or history efetch) in run_extraction
+    if details is None:
+        details = fetch_pubmed_details(pid)
     if "error" in details:
-        db["run_logs"].update_one(
-            {"_id": run_log_id},
-            {"$push": {"errors": {
-                "pubmed_id": pid,
-                "error": details["error"],
-                "timestamp": datetime.now()
-            }}}
-        )
+        record_error(db, run_log_id, pid, details["error"])
         return {"pubmed_id": pid, "skipped": True}
 
-    existing = db["articles"].find_one({"pubmed_id": pid})
-    details["updated_title"] = existing["updated_title"] if existing \
-        else compute_updated_title(details, abbr_map)
+    existing  = prepare_article(details, db, abbr_map, **prefetched)
 
     # ------- PDF handling -------
-    pdf_name = sanitize_filename(details["updated_title"]) + ".pdf"
-    # --- truncate if Windows path would be too long (≤140 chars keeps path <260) ---
-    if len(pdf_name) > 140:                             #   ← NEW
-        pdf_name = pdf_name[:140] + ".pdf"              #   ← NEW
-    local_pdf = os.path.join(PDF_DIR, pdf_name)
-    pdf_file  = local_pdf if os.path.exists(local_pdf) \
-               else attempt_pdf_download(details, new_filename=pdf_name)
-    full_text = extract_pdf_text(pdf_file) if pdf_file else ""
-
-    db["article_text"].update_one(
-        {"pubmed_id": pid},
-        {"$set": {"full_text": full_text}},
-        upsert=True
-    )
+    pdf_file  = resolve_pdf(details)
+    text_key, full_text = lookup_text(db, pid, pdf_file)
+    if full_text is None:                            # PDF changed or never extracted
+        full_text = extract_text_logged(db, run_log_id, pid, pdf_file, offload_cpu)
+        if full_text is None:                        # failed: store nothing, retry next run
+            full_text = ""
+        else:
+            store_text(db, pid, full_text, text_key, writer)
+
+    return {"details": details, "existing": existing,
+            "pdf_file": pdf_file, "full_text": full_text}
 
-    # ------- tagging & enrichment -------
-    tag_source = " ".join([details.get("title",""), details.get("abstract",""), full_text])
-    details["suggested_tags"]  = suggest_tags(tag_source, top_k=10)
-    details.setdefault("status", "Pending")          # keep existing status if any
-    # (Update 3: do NOT overwrite details["keywords"]; assume PubMed already set it)
-    details["pdf_file"]        = pdf_file or None
-    details["webscraped_date"] = datetime.now().strftime("%Y-%m-%d")
-
-    if existing:
-        db["articles"].update_one({"_id": existing["_id"]}, {"$set": details})
-    else:
-        db["articles"].insert_one(details)
 
-    return details                                   # Update 2: return full dict
+def _finish_pubmed_id(db, item, tags, writer=None):
+    persist_article(db, item["details"], item["existing"], item["pdf_file"], tags, writer)
+    return item["details"]                           # Update 2: return full dict
 
 
 # ----------------------------------------------------------------------
 # Helper utilities
 # ----------------------------------------------------------------------
-def _maybe_collect_paid(res, paid_seen, paid_citations, db):
+def _maybe_collect_paid(res, paid_seen, paid_citations):
+    # res is the persisted article dict, so no read-back from Mongo is needed
     if res.get("access") != "Paid":
         return
     pid = res["pubmed_id"]
     if pid in paid_seen:
         return
-    doc = db["articles"].find_one({"pubmed_id": pid})
-    if doc:
-        paid_citations.append(generate_citation(doc))
+    paid_citations.append(generate_citation(res))
     paid_seen.add(pid)
 
 
+def _close_writer(writer, db, run_log_id):
+    """Flush whatever is still queued and log per-op write failures in run_logs."""
+    try:
+        writer.close()
+    except Exception as e:
+        print(f"❌  Final bulk write failed: {e}")
+    if writer.errors:
+        print(f"⚠️  {len(writer.errors)} Mongo writes failed (see run_logs.errors)")
+        db["run_logs"].update_one({"_id": run_log_id},
+                                  {"$push": {"errors": {"$each": writer.errors}}})
+
+
+def _print_tag_timings(tagging, run_seconds):
+    if not tagging["articles"]:
+        return
+    share = 100 * tagging["seconds"] / run_seconds if run_seconds else 0.0
+    print(f"🏷️  Tagging: {tagging['articles']} articles ({tagging['cached']} cached), "
+          f"{tagging['seconds']:.1f}s total, {tagging['avg_ms']:.0f} ms avg, "
+          f"{share:.0f}% of run time (summed over workers)")
+
+
 # ---------- new global citation writer (Update 4) ----------
 def _write_all_citations(citations: list[str]):
     if not citations:
@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 
 def get_abbreviation_map(db):
     """
@@ -12,20 +13,63 @@ def get_abbreviation_map(db):
             abbr_map[full_term.strip().lower()] = abbr.strip()
     return abbr_map
 
+class AbbreviationMatcher:
+    """
+    All terms of an abbreviation map compiled into one regex: a single
+    alternation, longest term first, with the same word boundaries and
+    case-insensitivity as the old one-pattern-per-term loop.  One pass over
+    the text replaces every match; the abbreviation is looked up by the
+    lower-cased match.
+    """
+
+    def __init__(self, abbr_dict):
+        self.lookup = {}
+        for term in sorted(abbr_dict, key=len, reverse=True):
+            self.lookup.setdefault(term.lower(), abbr_dict[term])
+        self.pattern = re.compile(
+            r'(?<!\w)(?:' + '|'.join(map(re.escape, self.lookup)) + r')(?!\w)',
+            re.IGNORECASE
+        ) if self.lookup else None
+
+    def sub(self, text):
+        if not text or self.pattern is None:
+            return text
+        return self.pattern.sub(
+            lambda m: self.lookup.get(m.group(0).lower(), m.group(0)), text)
+
+@lru_cache(maxsize=8)
+def _matcher_for(items):
+    return AbbreviationMatcher(dict(items))
+
+def get_matcher(abbr_dict):
+    """The compiled matcher for `abbr_dict`, rebuilt only when the map changes."""
+    return _matcher_for(tuple(abbr_dict.items()))
+
 def replace_with_abbreviations(text, abbr_dict):
     """
     Replace full terms in 'text' with their abbreviations from 'abbr_dict'
-    using regex patterns that ensure exact matching (negative lookbehind/lookahead).
+    (whole words only, case-insensitive, longest term wins).
     """
     if not text or not abbr_dict:
         return text
+    return get_matcher(abbr_dict).sub(text)
 
-    result = text
-    sorted_terms = sorted(abbr_dict.keys(), key=len, reverse=True)
-    for term in sorted_terms:
-        pattern = re.compile(r'(?<!\w)' + re.escape(term) + r'(?!\w)', re.IGNORECASE)
-        result = pattern.sub(abbr_dict[term], result)
-    return result
+def normalize_title(title):
+    """Normalize punctuation the way compute_updated_title does before matching."""
+    normalized_title = re.sub(r'[-–—]', ' ', title or "")  # hyphens/dashes => space
+    normalized_title = re.sub(r'[.,;:()]+', ' ', normalized_title)
+    return re.sub(r'\s+', ' ', normalized_title).strip()
+
+def title_words(title):
+    """
+    Distinct lower-cased words of the normalized title, stored as
+    articles.title_words (multikey index).  Every word of an abbreviation
+    term that matches the title is among them.
+    """
+    return sorted(set(re.findall(r'\w+', normalize_title(title).lower())))
+
+def term_words(term):
+    return sorted(set(re.findall(r'\w+', term.lower())))
 
 def compute_updated_title(details, abbr_map):
     """
@@ -37,10 +81,7 @@ def compute_updated_title(details, abbr_map):
         # Log that minimal metadata was found
         print(f"Warning: PubMed ID {details.get('pubmed_id')} has minimal metadata (no title).")
 
-    # Normalize punctuation
-    normalized_title = re.sub(r'[-–—]', ' ', original_title)  # hyphens/dashes => space
-    normalized_title = re.sub(r'[.,;:()]+', ' ', normalized_title)
-    normalized_title = re.sub(r'\s+', ' ', normalized_title).strip()
+    normalized_title = normalize_title(original_title)
 
     # Replace full terms with abbreviations
     updated_title = replace_with_abbreviations(normalized_title, abbr_map)
@@ -1,23 +1,27 @@
-from flask import Flask, render_template, redirect, url_for, request, send_from_directory
+from flask import Flask, render_template, redirect, url_for, request, send_from_directory, jsonify
 from bson.objectid import ObjectId
-from pymongo import MongoClient
 import os, math
 from dotenv import load_dotenv
 from flask import Blueprint
-from db_utils import connect_to_mongo
+from mongo_client import get_db, health
+from article_stages import load_pages
+from pdf_sandbox import ExtractionFailed
+from config import PDF_PAGES_PER_REQUEST
+from review_counts import NavCounts, COUNT_FIELDS
+from utils import locate_pdf
 
 # Load environment
 load_dotenv()
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
 PDF_DIR   = os.getenv("PDF_DIR", "pdfs")
 
 app = Flask(__name__)  # Use default static folder "static"
+nav_counts = NavCounts()
 
 analytics_bp = Blueprint('analytics_bp', __name__)
-db = connect_to_mongo()
 
 @analytics_bp.route("/analytics")
 def analytics():
+    db = get_db()
     articles_coll = db["articles"]
     logs_coll = db["run_logs"]
 
@@ -42,7 +46,7 @@ def analytics():
     last_run_date = last_run["end_time"].strftime("%Y-%m-%d %H:%M:%S") if last_run else "N/A"
 
     # PDF download health
-    downloaded_pdfs = articles_coll.count_documents({"pdf_file": {"$regex": ".pdf$"}})
+    downloaded_pdfs = articles_coll.count_documents({"pdf_file": {"$regex": r"\.pdf$"}})
     pdf_health = {
         "downloaded": downloaded_pdfs,
         "missing": total_articles - downloaded_pdfs,
@@ -69,9 +73,12 @@ def analytics():
 
 app.register_blueprint(analytics_bp)
 
-def get_db():
-    client = MongoClient(MONGO_URI)
-    return client["research_papers"]
+# One pooled MongoClient per process (mongo_client.get_db); ping, pool
+# settings and per-command latency for load balancers and dashboards
+@app.get("/health")
+def health_check():
+    status = health()
+    return jsonify(status), (200 if status["ok"] else 503)
 
 @app.route("/")
 def index():
@@ -115,7 +122,9 @@ def index():
         page = 1
     skip = (page - 1) * PAGE_SIZE
 
-    total = coll.count_documents(query)
+    # nav-pill counts and this filter's total: one $facet, cached for NAV_COUNTS_TTL
+    counts, filtered = nav_counts.get(coll, tag_filter or None)
+    total = filtered.get(filter_category, filtered["all"])
     total_pages = math.ceil(total / PAGE_SIZE)
 
     docs = list(
@@ -132,20 +141,6 @@ def index():
         art["suggested_tags"]= art.get("suggested_tags", [])
         art["approved_tags"] = art.get("approved_tags", [])
 
-    # 5) Counts for nav-pills
-    counts = {
-        "pending": coll.count_documents({
-            "$or": [
-                {"status": {"$exists": False}},
-                {"status": "Pending"}
-            ]
-        }),
-        "free": coll.count_documents({"access": "Free", "status": "Pending"}),
-        "paid": coll.count_documents({"access": "Paid", "status": "Pending"}),
-        "approved": coll.count_documents({"status":"approved"}),
-        "rejected": coll.count_documents({"status":"rejected"})
-    }
-
     return render_template("index.html",
         articles=docs,
         filter_category=filter_category,
@@ -160,26 +155,60 @@ def index():
 def serve_pdf(filename):
     return send_from_directory(PDF_DIR, filename)
 
+# Full text, extracted a few pages at a time as the reviewer reads on
+@app.get("/article_text/<pubmed_id>")
+def article_text(pubmed_id):
+    db = get_db()
+    article = db["articles"].find_one({"pubmed_id": pubmed_id}, {"pdf_file": 1, "status": 1})
+    if not article:
+        return "Article not found", 404
+
+    try:
+        upto = max(1, int(request.args.get("pages", PDF_PAGES_PER_REQUEST)))
+    except ValueError:
+        upto = PDF_PAGES_PER_REQUEST
+
+    pdf_path = locate_pdf(article.get("pdf_file"), PDF_DIR)
+    if not pdf_path:
+        return "No PDF available for this article", 404
+    try:
+        pages, complete = load_pages(db, pubmed_id, pdf_path, upto)
+    except ExtractionFailed as e:
+        return f"Could not read PDF ({e.kind})", 500
+
+    return render_template("_pages.html",
+        pubmed_id=pubmed_id,
+        pages=pages[:upto],
+        complete=complete and len(pages) <= upto,
+        next_pages=upto + PDF_PAGES_PER_REQUEST,
+    )
+
 # Approve/Reject now POST + htmx delete
 @app.post("/approve/<article_id>")
 def approve_article(article_id):
     db = get_db()
-    db["articles"].update_one({"_id": ObjectId(article_id)},
-                              {"$set": {"status": "approved"}})
+    before = db["articles"].find_one_and_update({"_id": ObjectId(article_id)},
+                                                {"$set": {"status": "approved"}},
+                                                projection=COUNT_FIELDS)
+    nav_counts.moved(before, "approved")
     return ("", 200)          # ← was 204
 
 @app.post("/reject/<article_id>")
 def reject_article(article_id):
     db = get_db()
-    db["articles"].update_one({"_id": ObjectId(article_id)},
-                              {"$set": {"status": "rejected"}})
+    before = db["articles"].find_one_and_update({"_id": ObjectId(article_id)},
+                                                {"$set": {"status": "rejected"}},
+                                                projection=COUNT_FIELDS)
+    nav_counts.moved(before, "rejected")
     return ("", 200)          # ← was 204
 
 @app.post("/undo/<article_id>")
 def undo_review(article_id):
     db = get_db()
-    db["articles"].update_one({"_id": ObjectId(article_id)},
-                              {"$unset": {"status": ""}})
+    before = db["articles"].find_one_and_update({"_id": ObjectId(article_id)},
+                                                {"$unset": {"status": ""}},
+                                                projection=COUNT_FIELDS)
+    nav_counts.moved(before, None)
     return ("", 200)          # ← was 204
 
 @app.post("/move_to_folder/<article_id>")
@@ -226,8 +255,10 @@ def move_to_folder(article_id):
 @app.post("/approve_tag/<article_id>/<tag>")
 def approve_tag(article_id, tag):
     db = get_db()
-    db["articles"].update_one({"_id": ObjectId(article_id)},
-                              {"$addToSet": {"approved_tags": tag}})
+    before = db["articles"].find_one_and_update({"_id": ObjectId(article_id)},
+                                                {"$addToSet": {"approved_tags": tag}},
+                                                projection=COUNT_FIELDS)
+    nav_counts.tag_added(before, tag)
     return ("", 204)
 
 @app.post("/add_tag/<article_id>")
@@ -235,8 +266,10 @@ def add_tag(article_id):
     tag = request.form.get("tag", "").strip()
     if tag:
         db = get_db()
-        db["articles"].update_one({"_id": ObjectId(article_id)},
-                                  {"$addToSet": {"approved_tags": tag}})
+        before = db["articles"].find_one_and_update({"_id": ObjectId(article_id)},
+                                                    {"$addToSet": {"approved_tags": tag}},
+                                                    projection=COUNT_FIELDS)
+        nav_counts.tag_added(before, tag)
     return ("", 204)
 
 if __name__ == "__main__":
@@ -0,0 +1,311 @@
+"""
+article_stages.py  ·  The per-article steps of the PubMed-to-Mongo pipeline
+---------------------------------------------------------------------------
+SciCom.process_pubmed_id runs these in sequence for one article; the async
+engine in pipeline.py runs each one as its own stage.  Keeping the steps in
+one place guarantees both engines write identical documents.
+"""
+
+from config import (PDF_DIR, PDF_SANDBOX, KNOWN_ARTICLE_POLICY, KNOWN_ARTICLE_POLICIES,
+                    EFETCH_BATCH_SIZE)
+from pubmed_utils import search_pubmed_ids, search_and_fetch, fetch_pubmed_details_batch
+from pdf_utils import attempt_pdf_download
+from abbrev_utils import compute_updated_title, title_words
+from utils import pdf_filename
+from pdf_text_utils import extract_pdf_text, extract_pdf_pages, pdf_text_key
+from tag_utils import suggest_tags, suggest_tags_batch, build_tag_source, tag_key, tag_timings
+from pdf_sandbox import get_sandbox, ExtractionFailed
+from cpu_pool import run_cpu
+
+import functools
+import os
+import time
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+
+def record_error(db, run_log_id, pid, error, **extra):
+    """Push an entry to run_logs.errors; `extra` adds structured fields (stage, kind, ...)."""
+    db["run_logs"].update_one(
+        {"_id": run_log_id},
+        {"$push": {"errors": {
+            "pubmed_id": pid,
+            "error": error,
+            "timestamp": datetime.now(),
+            **extra
+        }}}
+    )
+
+
+# Fields read back for already-stored articles: what prepare/tag/persist
+# reuse plus every CSV export and citation column.
+KNOWN_FIELDS = [
+    "pubmed_id", "title", "abstract", "authors", "journal", "publication_date",
+    "doi", "fulltext_link", "pmcid", "access", "updated_title", "pdf_file",
+    "suggested_tags", "tag_key", "webscraped_date", "status", "keywords",
+    "volume", "issue", "pages",
+]
+
+
+def prefetch_known(db, pids):
+    """Stored articles among `pids`, as {pubmed_id: doc}, in one $in query."""
+    pids = [pid for pid in pids if pid]
+    if not pids:
+        return {}
+    cursor = db["articles"].find({"pubmed_id": {"$in": pids}}, KNOWN_FIELDS)
+    return {doc["pubmed_id"]: doc for doc in cursor}
+
+
+def fetch_keyword(db, query, start_date, end_date, policy=KNOWN_ARTICLE_POLICY):
+    """
+    Search PubMed for `query` and return (known, batches).  `batches` yields
+    lists of work items {"details", "existing"} that need full processing
+    (None when the search found nothing); `known` lists stored docs to pass
+    to refresh_article.
+
+    policy "refresh"/"skip": the hit list comes from search_pubmed_ids (read
+    off the history server when enabled); IDs already in Mongo (one $in
+    query) are not efetched or processed again, and the new ones are
+    efetched in EFETCH_BATCH_SIZE chunks as the batches are consumed;
+    "refresh" returns them in `known`, "skip" drops them.  "full":
+    everything is reprocessed (history-server streaming when enabled), with
+    each batch's stored docs prefetched.  Any other policy is a ValueError.
+    """
+    if policy not in KNOWN_ARTICLE_POLICIES:
+        raise ValueError(f"unknown known-article policy {policy!r}; "
+                         f"expected one of {', '.join(KNOWN_ARTICLE_POLICIES)}")
+    if policy == "full":
+        batches = search_and_fetch(query, start_date, end_date)
+        if batches is None:
+            return [], None
+        return [], (_with_existing(db, batch) for batch in batches)
+
+    ids = search_pubmed_ids(query, start_date, end_date)
+    if not ids:
+        return [], None
+    known = prefetch_known(db, ids)
+    new_ids = [pid for pid in ids if pid not in known]
+    print(f"➡️  Found {len(ids)} articles ({len(known)} already stored: {policy})")
+    batches = (
+        [{"details": details, "existing": None}
+         for details in fetch_pubmed_details_batch(new_ids[i:i + EFETCH_BATCH_SIZE]).values()]
+        for i in range(0, len(new_ids), EFETCH_BATCH_SIZE)
+    )
+    return (list(known.values()) if policy == "refresh" else []), batches
+
+
+def _with_existing(db, batch):
+    known = prefetch_known(db, [details.get("pubmed_id") for details in batch])
+    return [{"details": details, "existing": known.get(details.get("pubmed_id"))}
+            for details in batch]
+
+
+def refresh_article(db, doc, writer=None):
+    """
+    Cheap path for an article stored on an earlier run: stamp last_seen
+    and return the stored doc as the run result (CSV row, citation).
+    """
+    update = {"$set": {"last_seen": datetime.now().strftime("%Y-%m-%d")}}
+    if writer is not None:
+        writer.add("articles", UpdateOne({"_id": doc["_id"]}, update))
+    else:
+        db["articles"].update_one({"_id": doc["_id"]}, update)
+    return doc
+
+
+_LOOKUP = object()
+
+def prepare_article(details, db, abbr_map, existing=_LOOKUP):
+    """
+    Set details["updated_title"] and return the stored doc, looked up by
+    pubmed_id unless the caller prefetched it (`existing`, None if new).
+    """
+    if existing is _LOOKUP:
+        existing = db["articles"].find_one({"pubmed_id": details["pubmed_id"]})
+    details["updated_title"] = existing["updated_title"] if existing \
+        else compute_updated_title(details, abbr_map)
+    return existing
+
+
+def resolve_pdf(details):
+    """Return the local PDF path, downloading from PMC OA if it is not on disk yet."""
+    pdf_name = pdf_filename(details["updated_title"])
+    local_pdf = os.path.join(PDF_DIR, pdf_name)
+    return local_pdf if os.path.exists(local_pdf) \
+        else attempt_pdf_download(details, new_filename=pdf_name)
+
+
+def extract_text(pdf_file, offload=False):
+    """
+    Extract PDF text. With PDF_SANDBOX each file runs in a time- and
+    memory-limited worker process; otherwise extraction runs in-process, or
+    in the cpu_pool when `offload` is set.  Either way a failure raises
+    pdf_sandbox.ExtractionFailed.
+    """
+    if not pdf_file or not os.path.isfile(pdf_file):
+        return ""
+    if PDF_SANDBOX:
+        return get_sandbox().extract(pdf_file)
+    started = time.monotonic()
+    extract = functools.partial(extract_pdf_text, strict=True)
+    try:
+        return run_cpu(extract, pdf_file) if offload else extract(pdf_file)
+    except Exception as e:
+        raise ExtractionFailed(pdf_file, "exception", f"{type(e).__name__}: {e}",
+                               time.monotonic() - started) from e
+
+
+def extract_text_logged(db, run_log_id, pid, pdf_file, offload=False):
+    """
+    extract_text, recording a failure in run_logs.errors and returning None.
+    Callers must not store a text_key for a failed extraction, so that the
+    PDF is tried again on the next run.
+    """
+    try:
+        return extract_text(pdf_file, offload)
+    except ExtractionFailed as e:
+        print(f"⚠️ PDF extraction {e.kind} for {pid} ({pdf_file}): {e.message}")
+        err = e.as_error()
+        record_error(db, run_log_id, pid, err.pop("error"), **err)
+        return None
+
+
+def lookup_text(db, pid, pdf_file):
+    """
+    Return (text_key, full_text) where full_text is the stored text when the
+    article_text doc was extracted from the same PDF bytes with the same
+    engine and page limit, else None (extraction and upsert are needed).
+    """
+    text_key = pdf_text_key(pdf_file)
+    doc = db["article_text"].find_one(
+        {"pubmed_id": pid, "text_key": text_key},
+        {"full_text": 1}
+    )
+    return text_key, (doc.get("full_text", "") if doc else None)
+
+
+def store_text(db, pid, full_text, text_key=None, writer=None):
+    """Upsert article_text; queued on `writer` (a BulkWriter) when given."""
+    query, update = {"pubmed_id": pid}, {"$set": {"full_text": full_text, "text_key": text_key}}
+    if writer is not None:
+        writer.add("article_text", UpdateOne(query, update, upsert=True))
+    else:
+        db["article_text"].update_one(query, update, upsert=True)
+
+
+def load_pages(db, pid, pdf_file, upto):
+    """
+    Return (pages, complete) with the text of at least the first `upto`
+    pages, extracting only the pages not yet cached in article_text.pages.
+    `complete` is True once the whole PDF has been read.  The cache is
+    keyed on the PDF bytes and engine (pages_key) and restarts when the
+    file changes.  Raises pdf_sandbox.ExtractionFailed under PDF_SANDBOX.
+    """
+    pages_key = pdf_text_key(pdf_file, max_pages="all")
+    doc = db["article_text"].find_one(
+        {"pubmed_id": pid},
+        {"pages": 1, "pages_key": 1, "pages_complete": 1}
+    ) or {}
+    if doc.get("pages_key") == pages_key:
+        pages = doc.get("pages", [])
+        complete = doc.get("pages_complete", False)
+    else:
+        pages, complete = [], False
+
+    if complete or len(pages) >= upto or not os.path.isfile(pdf_file or ""):
+        return pages, complete or not os.path.isfile(pdf_file or "")
+
+    start = len(pages)
+    new_pages = get_sandbox().extract_pages(pdf_file, start, upto) if PDF_SANDBOX \
+        else extract_pdf_pages(pdf_file, start, upto)
+    complete = len(new_pages) < upto - start
+
+    if start:
+        db["article_text"].update_one(
+            {"pubmed_id": pid, "pages_key": pages_key, "pages": {"$size": start}},
+            {"$push": {"pages": {"$each": new_pages}},
+             "$set": {"pages_complete": complete}}
+        )
+    else:
+        db["article_text"].update_one(
+            {"pubmed_id": pid},
+            {"$set": {"pages": new_pages, "pages_key": pages_key,
+                      "pages_complete": complete}},
+            upsert=True
+        )
+    return pages + new_pages, complete
+
+
+def _tag_source(details, full_text, existing):
+    """
+    Return (source, stored) where source is the tagger input and stored
+    the existing suggested_tags when the article's tag_key (input hash) is
+    unchanged, else None.  Sets details["tag_key"].
+    """
+    source = build_tag_source(details.get("title", ""), details.get("abstract", ""), full_text)
+    details["tag_key"] = tag_key(source, 10)
+    if existing and existing.get("tag_key") == details["tag_key"] \
+            and "suggested_tags" in existing:
+        return source, existing["suggested_tags"]
+    return source, None
+
+
+def tag_article(details, full_text, existing=None, run=None):
+    """
+    Suggest tags from title + abstract + the start of full_text, reusing the
+    stored suggested_tags when the input is unchanged.  `run(fn, *args)`
+    executes YAKE elsewhere, e.g. cpu_pool.run_cpu.  Time goes to
+    tag_timings.
+    """
+    started = time.perf_counter()
+    source, tags = _tag_source(details, full_text, existing)
+    cached = tags is not None
+    if not cached:
+        tags = run(suggest_tags, source, 10) if run else suggest_tags(source, 10)
+    tag_timings.add(time.perf_counter() - started, len(source), cached)
+    return tags
+
+
+def tag_articles(items, executor=None):
+    """
+    tag_article for a list of (details, full_text, existing) in one
+    suggest_tags_batch call, fanned out over `executor` (an executor or a
+    factory like cpu_pool.get_cpu_pool) when given.
+    """
+    started = time.perf_counter()
+    sources, tags = zip(*(_tag_source(*item) for item in items)) if items else ((), ())
+    tags = list(tags)
+    todo = [i for i, t in enumerate(tags) if t is None]
+    pending = set(todo)
+    for i, new in zip(todo, suggest_tags_batch([sources[i] for i in todo], 10, executor)):
+        tags[i] = new
+
+    per_article = (time.perf_counter() - started) / len(items) if items else 0.0
+    for i, source in enumerate(sources):
+        tag_timings.add(per_article, len(source), i not in pending)
+    return tags
+
+
+def persist_article(db, details, existing, pdf_file, suggested_tags, writer=None):
+    """
+    Fill in the enrichment fields and insert/update the articles document,
+    or queue the write on `writer` (a BulkWriter).  Queued new articles are
+    upserted by pubmed_id, so a PMID seen twice before a flush is stored once.
+    """
+    details["suggested_tags"]  = suggested_tags
+    details["title_words"]     = title_words(details.get("title", ""))
+    details.setdefault("status", "Pending")          # keep existing status if any
+    # (do NOT overwrite details["keywords"]; PubMed already set it)
+    details["pdf_file"]        = pdf_file or None
+    details["webscraped_date"] = datetime.now().strftime("%Y-%m-%d")
+
+    if writer is not None:
+        writer.add("articles",
+                   UpdateOne({"_id": existing["_id"]}, {"$set": details}) if existing else
+                   UpdateOne({"pubmed_id": details["pubmed_id"]}, {"$set": details}, upsert=True))
+    elif existing:
+        db["articles"].update_one({"_id": existing["_id"]}, {"$set": details})
+    else:
+        db["articles"].insert_one(details)
+    return details
@@ -0,0 +1,149 @@
+"""
+backfill_text.py  ·  Re-extract article_text for the whole local PDF library
+---------------------------------------------------------------------------
+Use after raising MAX_PDF_PAGES or switching PDF_TEXT_ENGINE.  Scans
+PDF_DIR plus its approved/ and rejected/ subfolders, maps each file to its
+article through articles.pdf_file, re-extracts in parallel worker processes and writes
+article_text back with bulk_write.  Never touches the network.
+
+Resumable: every written doc carries the text_key (PDF hash + engine +
+page limit), and files whose stored key already matches are skipped, so an
+interrupted backfill picks up where it stopped.  Extraction goes through
+the pdf_sandbox workers, so a pathological PDF is reported and skipped
+instead of stalling the backfill.
+
+    python backfill_text.py [--workers N] [--batch-size 50] [--force] [--dry-run]
+"""
+
+import argparse
+import concurrent.futures
+import os
+import sys
+import time
+
+from pymongo import UpdateOne
+
+from config import PDF_DIR, CPU_WORKERS
+from db_utils import connect_to_mongo
+from pdf_text_utils import pdf_text_key
+from pdf_sandbox import SandboxPool, ExtractionFailed
+
+SUBFOLDERS = ("", "approved", "rejected")       # move_to_folder destinations
+
+
+def scan_library(pdf_dir=PDF_DIR):
+    """Return {basename: path} for every PDF in pdf_dir and its review folders."""
+    found = {}
+    for sub in SUBFOLDERS:
+        folder = os.path.join(pdf_dir, sub)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            path = os.path.join(folder, name)
+            if name.lower().endswith(".pdf") and os.path.isfile(path):
+                found.setdefault(name, path)
+    return found
+
+
+def map_to_articles(db, files):
+    """Return [(pubmed_id, path)] for files referenced by articles.pdf_file."""
+    jobs = []
+    cursor = db["articles"].find(
+        {"pdf_file": {"$type": "string"}},
+        {"pubmed_id": 1, "pdf_file": 1, "_id": 0}
+    )
+    for doc in cursor:
+        name = os.path.basename(doc["pdf_file"])
+        if name in files:
+            jobs.append((doc["pubmed_id"], files[name]))
+    return jobs
+
+
+def pending_jobs(db, jobs, force=False):
+    """Attach text keys and drop jobs whose article_text is already current."""
+    stored = {}
+    if not force:
+        pids = [pid for pid, _ in jobs]
+        for doc in db["article_text"].find({"pubmed_id": {"$in": pids}},
+                                           {"pubmed_id": 1, "text_key": 1, "_id": 0}):
+            stored[doc["pubmed_id"]] = doc.get("text_key")
+
+    todo = []
+    for pid, path in jobs:
+        key = pdf_text_key(path)
+        if force or stored.get(pid) != key:
+            todo.append((pid, path, key))
+    return todo
+
+
+def _progress(done, total, started, stats):
+    rate = done / max(time.perf_counter() - started, 1e-9)
+    sys.stdout.write(
+        f"\r📄  [{done:>{len(str(total))}}/{total}] {rate:6.1f} files/s  "
+        f"written={stats['written']} empty={stats['empty']} failed={stats['failed']}"
+    )
+    sys.stdout.flush()
+
+
+def _flush(db, ops, stats):
+    if not ops:
+        return
+    db["article_text"].bulk_write(ops, ordered=False)
+    stats["written"] += len(ops)
+    ops.clear()
+
+
+def run_backfill(workers=CPU_WORKERS, batch_size=50, force=False, dry_run=False):
+    db = connect_to_mongo()
+    files = scan_library()
+    jobs = map_to_articles(db, files)
+    todo = pending_jobs(db, jobs, force=force)
+    print(f"🔷  {len(files)} PDFs on disk, {len(jobs)} linked to articles, "
+          f"{len(todo)} need extraction")
+    if dry_run or not todo:
+        return
+
+    stats = {"written": 0, "empty": 0, "failed": 0}
+    ops, done, started = [], 0, time.perf_counter()
+    sandbox = SandboxPool(size=workers)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(sandbox.extract, path): (pid, path, key)
+                   for pid, path, key in todo}
+        try:
+            for fut in concurrent.futures.as_completed(futures):
+                pid, path, key = futures[fut]
+                done += 1
+                try:
+                    full_text = fut.result()
+                except ExtractionFailed as e:
+                    stats["failed"] += 1
+                    print(f"\n⚠️  {path}: {e}")
+                else:
+                    if not full_text:
+                        stats["empty"] += 1
+                    ops.append(UpdateOne(
+                        {"pubmed_id": pid},
+                        {"$set": {"full_text": full_text, "text_key": key}},
+                        upsert=True
+                    ))
+                    if len(ops) >= batch_size:
+                        _flush(db, ops, stats)
+                _progress(done, len(todo), started, stats)
+        finally:
+            _flush(db, ops, stats)          # keep finished work on Ctrl-C / errors
+            for f in futures:
+                f.cancel()
+            sandbox.close()
+
+    print(f"\n✅  Backfill finished: {stats['written']} written, "
+          f"{stats['empty']} empty, {stats['failed']} failed")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Re-extract article_text for the local PDF library.")
+    ap.add_argument("--workers", type=int, default=CPU_WORKERS)
+    ap.add_argument("--batch-size", type=int, default=50, help="bulk_write batch size")
+    ap.add_argument("--force", action="store_true", help="re-extract even if text_key matches")
+    ap.add_argument("--dry-run", action="store_true", help="only report what would be done")
+    args = ap.parse_args()
+    run_backfill(args.workers, args.batch_size, args.force, args.dry_run)
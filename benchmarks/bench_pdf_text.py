@@ -0,0 +1,75 @@
+"""
+bench_pdf_text.py  ·  PyMuPDF vs. PyPDF2 on the local PDF library
+---------------------------------------------------------------------------
+Runs every extraction engine over the PDFs in PDF_DIR and reports
+throughput (pages/s) and the share of PDFs that come back with no text.
+
+    python benchmarks/bench_pdf_text.py                 # MAX_PDF_PAGES pages
+    python benchmarks/bench_pdf_text.py --max-pages 0   # whole documents
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import PDF_DIR, MAX_PDF_PAGES  # noqa: E402
+from pdf_text_utils import ENGINES  # noqa: E402
+from itertools import islice  # noqa: E402
+
+
+def bench_engine(name, paths, max_pages):
+    pages_of = ENGINES[name]
+    pages = empty = failed = chars = 0
+    t0 = time.perf_counter()
+    for path in paths:
+        try:
+            parts = list(islice(pages_of(path, 0), max_pages))
+        except Exception:
+            failed += 1
+            continue
+        pages += len(parts)
+        text = "\n".join(parts).strip()
+        chars += len(text)
+        if not text:
+            empty += 1
+    elapsed = time.perf_counter() - t0
+    return {
+        "engine": name,
+        "seconds": elapsed,
+        "pages": pages,
+        "pages_per_s": pages / elapsed if elapsed else 0.0,
+        "empty": empty,
+        "failed": failed,
+        "chars": chars,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--pdf-dir", default=PDF_DIR)
+    ap.add_argument("--max-pages", type=int, default=MAX_PDF_PAGES,
+                    help="pages per PDF (0 = all pages)")
+    args = ap.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.pdf_dir, "**", "*.pdf"), recursive=True))
+    if not paths:
+        print(f"No PDFs found in {args.pdf_dir}")
+        return
+    max_pages = args.max_pages or 10 ** 6
+    size_mb = sum(os.path.getsize(p) for p in paths) / 1e6
+    print(f"{len(paths)} PDFs ({size_mb:.0f} MB), "
+          f"{'all' if not args.max_pages else args.max_pages} pages each\n")
+
+    print(f"{'engine':<8} {'seconds':>8} {'pages':>6} {'pages/s':>8} "
+          f"{'empty':>6} {'failed':>6} {'chars':>9}")
+    rows = [bench_engine(name, paths, max_pages) for name in ENGINES]
+    for r in rows:
+        print(f"{r['engine']:<8} {r['seconds']:8.2f} {r['pages']:6d} {r['pages_per_s']:8.1f} "
+              f"{r['empty'] / len(paths):6.1%} {r['failed']:6d} {r['chars']:9d}")
+
+
+if __name__ == "__main__":
+    main()
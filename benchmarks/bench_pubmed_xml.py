@@ -0,0 +1,177 @@
+"""
+bench_pubmed_xml.py  ·  lxml iterparse parser vs. the old BeautifulSoup path
+---------------------------------------------------------------------------
+Builds a synthetic efetch PubmedArticleSet, parses it with both parsers,
+checks that every field matches and prints articles/s for each.
+
+    python benchmarks/bench_pubmed_xml.py --articles 500 --repeat 3
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pubmed_xml import iter_pubmed_articles, parse_pub_date  # noqa: E402
+
+
+ARTICLE_TEMPLATE = """
+  <PubmedArticle>
+    <MedlineCitation Status="MEDLINE" Owner="NLM">
+      <PMID Version="1">{pmid}</PMID>
+      <Article PubModel="Print-Electronic">
+        <Journal>
+          <JournalIssue CitedMedium="Internet">
+            <Volume>{volume}</Volume>
+            <Issue>{issue}</Issue>
+            <PubDate><Year>2025</Year><Month>Mar</Month><Day>{day}</Day></PubDate>
+          </JournalIssue>
+          <Title>Journal of Structural Heart Disease</Title>
+        </Journal>
+        <ArticleTitle>Outcomes of transcatheter aortic valve implantation in cohort {pmid}.</ArticleTitle>
+        <Pagination><MedlinePgn>{volume}-{issue}</MedlinePgn></Pagination>
+        <ELocationID EIdType="doi" ValidYN="Y">10.1000/shd.{pmid}</ELocationID>
+        <Abstract>
+          <AbstractText Label="BACKGROUND">Severe aortic stenosis is common in elderly patients. {filler}</AbstractText>
+          <AbstractText Label="METHODS">We enrolled consecutive patients undergoing TAVI. {filler}</AbstractText>
+          <AbstractText Label="RESULTS">Mortality at one year was low. {filler}</AbstractText>
+        </Abstract>
+        <AuthorList CompleteYN="Y">
+          {authors}
+        </AuthorList>
+      </Article>
+      <KeywordList Owner="NOTNLM">
+        <Keyword MajorTopicYN="N">TAVI</Keyword>
+        <Keyword MajorTopicYN="N">aortic stenosis</Keyword>
+        <Keyword MajorTopicYN="N">pacemaker</Keyword>
+      </KeywordList>
+    </MedlineCitation>
+    <PubmedData>
+      <ArticleIdList>
+        <ArticleId IdType="pubmed">{pmid}</ArticleId>
+        <ArticleId IdType="doi">10.1000/shd.{pmid}</ArticleId>
+        <ArticleId IdType="pmc">{pmc}</ArticleId>
+      </ArticleIdList>
+      <ReferenceList>
+        {references}
+      </ReferenceList>
+    </PubmedData>
+  </PubmedArticle>"""
+
+AUTHOR_TEMPLATE = "<Author><LastName>Author{i}</LastName><ForeName>First{i}</ForeName></Author>"
+REFERENCE_TEMPLATE = "<Reference><Citation>Reference {i} et al. J Cardiol. 2020.</Citation></Reference>"
+
+
+def build_article_set(n):
+    filler = "Lorem ipsum dolor sit amet consectetur adipiscing elit. " * 8
+    parts = ['<?xml version="1.0"?>\n<PubmedArticleSet>']
+    for k in range(n):
+        pmid = str(40000000 + k)
+        parts.append(ARTICLE_TEMPLATE.format(
+            pmid=pmid,
+            volume=10 + k % 40,
+            issue=1 + k % 12,
+            day=1 + k % 28,
+            filler=filler,
+            pmc=f"{11000000 + k}" if k % 2 else f"PMC{11000000 + k}",
+            authors="".join(AUTHOR_TEMPLATE.format(i=i) for i in range(8)),
+            references="".join(REFERENCE_TEMPLATE.format(i=i) for i in range(30)),
+        ))
+    parts.append("</PubmedArticleSet>")
+    return "".join(parts).encode("utf-8")
+
+
+def parse_with_soup(xml_bytes):
+    """The pre-lxml fetch_pubmed_details parsing logic, minus the OA call."""
+    soup = BeautifulSoup(xml_bytes, "xml")
+    out = []
+    for art in soup.find_all("PubmedArticle"):
+        pubmed_id = art.find("PMID").text.strip()
+
+        title_tag = art.find("ArticleTitle")
+        abstract_tags = art.find_all("AbstractText")
+        authors_list = []
+        for author in art.find_all("Author"):
+            firstname = author.find("ForeName")
+            lastname = author.find("LastName")
+            if firstname and lastname:
+                authors_list.append(f"{firstname.text} {lastname.text}")
+        journal_tag = art.find("Title")
+        doi_tag = art.find("ArticleId", {"IdType": "doi"})
+        link_tag = art.find("ELocationID", {"EIdType": "doi", "ValidYN": "Y"})
+
+        pmcid = "No PMC ID"
+        for aid in art.find_all("ArticleId"):
+            if aid.get("IdType") == "pmc":
+                raw = aid.text.strip()
+                pmcid = raw if raw.startswith("PMC") else f"PMC{raw}"
+                break
+        pubmed_id_tag = art.find("ArticleId", {"IdType": "pubmed"})
+        if pubmed_id_tag and pubmed_id_tag.text.strip() != pubmed_id:
+            pmcid = "No PMC ID"
+
+        volume_tag = art.find("Volume")
+        issue_tag = art.find("Issue")
+        pages_tag = art.find("MedlinePgn")
+        out.append({
+            "pubmed_id": pubmed_id,
+            "title": title_tag.text if title_tag else "No Title Found",
+            "abstract": "\n".join(
+                f"{a.get('Label') + ': ' if a.get('Label') else ''}{a.text}"
+                for a in abstract_tags
+            ) if abstract_tags else "No Abstract Found",
+            "authors": authors_list,
+            "keywords": [kw.text for kw in art.find_all("Keyword") if kw.text],
+            "journal": journal_tag.text if journal_tag else "No Journal Found",
+            "publication_date": parse_pub_date(art.find("PubDate")),
+            "doi": doi_tag.text.strip() if doi_tag else "No DOI Found",
+            "fulltext_link": f"https://doi.org/{link_tag.text.strip()}" if link_tag else "No Full Text Link",
+            "pmcid": pmcid if pmcid != "No PMC ID" else None,
+            "volume": volume_tag.text if volume_tag else "",
+            "issue": issue_tag.text if issue_tag else "",
+            "pages": pages_tag.text if pages_tag else "",
+        })
+    return out
+
+
+def parse_with_lxml(xml_bytes):
+    return list(iter_pubmed_articles(io.BytesIO(xml_bytes)))
+
+
+def best_of(fn, arg, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--articles", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    xml_bytes = build_article_set(args.articles)
+    print(f"Payload: {args.articles} articles, {len(xml_bytes) / 1e6:.1f} MB")
+
+    t_soup, soup_rows = best_of(parse_with_soup, xml_bytes, args.repeat)
+    t_lxml, lxml_rows = best_of(parse_with_lxml, xml_bytes, args.repeat)
+
+    mismatches = [a["pubmed_id"] for a, b in zip(soup_rows, lxml_rows) if a != b]
+    if len(soup_rows) != len(lxml_rows) or mismatches:
+        print(f"❌  Field mismatch for {len(mismatches)} articles, e.g. {mismatches[:5]}")
+        sys.exit(1)
+
+    print(f"BeautifulSoup : {t_soup:8.3f} s  ({args.articles / t_soup:8.0f} articles/s)")
+    print(f"lxml iterparse: {t_lxml:8.3f} s  ({args.articles / t_lxml:8.0f} articles/s)")
+    print(f"Speedup       : {t_soup / t_lxml:8.1f}×  (outputs identical)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+bench_tagging.py  ·  YAKE vs. the TF-IDF tag engine
+---------------------------------------------------------------------------
+Tags the title + abstract of every article in research_papers.articles.csv
+(the Mongo export in the repo root) with both engines and reports
+throughput and how many of YAKE's top-k tags the TF-IDF engine also
+suggests.  The TF-IDF model is fitted on the same documents first; the fit
+time is reported separately, since in production it happens once and is
+then updated incrementally.  Finally it times YAKE through one
+suggest_tags call per article against one suggest_tags_batch call fanned
+out over the cpu_pool.
+
+    python benchmarks/bench_tagging.py [--csv research_papers.articles.csv] [--top-k 10]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import tag_utils  # noqa: E402
+from tag_utils import get_extractor, build_tag_source  # noqa: E402
+from tfidf_tags import TfidfModel  # noqa: E402
+from cpu_pool import get_cpu_pool, shutdown_cpu_pool  # noqa: E402
+from config import CPU_WORKERS  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def yake_tags(texts, top_k):
+    extractor = get_extractor()
+    out = []
+    for text in texts:
+        keywords = sorted(extractor.extract_keywords(text), key=lambda x: x[1])[:top_k]
+        out.append([phrase for phrase, score in keywords])
+    return out
+
+
+def overlap(a, b, top_k):
+    """Share of a's tags also in b (case-insensitive), averaged over documents."""
+    scores = [
+        len({t.lower() for t in x} & {t.lower() for t in y}) / top_k
+        for x, y in zip(a, b) if x
+    ]
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--csv", default=os.path.join(ROOT, "research_papers.articles.csv"))
+    ap.add_argument("--top-k", type=int, default=10)
+    args = ap.parse_args()
+
+    df = pd.read_csv(args.csv, usecols=["title", "abstract"]).fillna("")
+    texts = [build_tag_source(t, a, "") for t, a in zip(df["title"], df["abstract"])]
+    print(f"{len(texts)} documents, "
+          f"{sum(len(t) for t in texts) / len(texts):.0f} chars avg, top_k={args.top_k}\n")
+
+    get_extractor()                                   # exclude setup from timings
+    t0 = time.perf_counter()
+    yake_out = yake_tags(texts, args.top_k)
+    yake_s = time.perf_counter() - t0
+
+    model = TfidfModel()
+    t0 = time.perf_counter()
+    model.partial_fit(texts)
+    fit_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    tfidf_out = model.suggest_tags(texts, args.top_k)
+    tfidf_s = time.perf_counter() - t0
+
+    print(f"{'engine':<8} {'seconds':>8} {'docs/s':>8}")
+    print(f"{'yake':<8} {yake_s:8.2f} {len(texts) / yake_s:8.1f}")
+    print(f"{'tfidf':<8} {tfidf_s:8.2f} {len(texts) / tfidf_s:8.1f}   "
+          f"(+{fit_s:.2f}s one-off fit, {len(model.terms)} terms)")
+    print(f"\ntag overlap with YAKE: {overlap(yake_out, tfidf_out, args.top_k):.1%}")
+
+    if tag_utils.TAG_ENGINE != "yake":
+        return
+    tag_utils.clear_tag_cache()
+    t0 = time.perf_counter()
+    single = [tag_utils.suggest_tags(t, args.top_k) for t in texts]
+    single_s = time.perf_counter() - t0
+
+    tag_utils.clear_tag_cache()
+    pool = get_cpu_pool()
+    list(pool.map(abs, range(CPU_WORKERS)))         # start the workers first
+    try:
+        t0 = time.perf_counter()
+        batch = tag_utils.suggest_tags_batch(texts, args.top_k, executor=pool)
+        batch_s = time.perf_counter() - t0
+    finally:
+        shutdown_cpu_pool()
+    assert batch == single
+    print(f"\n{'suggest_tags, one call per article':<40} {1000 * single_s / len(texts):6.2f} ms/article")
+    print(f"{f'suggest_tags_batch, {CPU_WORKERS} workers':<40} {1000 * batch_s / len(texts):6.2f} ms/article")
+
+
+if __name__ == "__main__":
+    main()
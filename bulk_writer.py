@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from config import BULK_BATCH_SIZE, BULK_FLUSH_SECONDS, BULK_ORDERED
+
+# -------------------- Buffered Mongo writes --------------------
+#
+# Per-article persistence used to cost one round trip per write (article_text
+# upsert, articles insert/update).  BulkWriter queues those operations per
+# collection and sends them as bulk_write batches once BULK_BATCH_SIZE ops
+# are waiting or BULK_FLUSH_SECONDS have passed since the last flush
+# (checked on add), and on flush()/close() at the end of a run or on error.
+#
+# Ordered batches keep several writes to the same document in sequence; on
+# a write error the rest of the batch is resubmitted, so one bad document
+# never drops the others.  Every failed op ends up in `errors`.
+
+class BulkWriter:
+
+    def __init__(self, db, batch_size=BULK_BATCH_SIZE, flush_seconds=BULK_FLUSH_SECONDS,
+                 ordered=BULK_ORDERED):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.ordered = ordered
+        self.errors = []
+        self.written = 0
+        self.flushes = 0
+        self._ops = defaultdict(list)
+        self._pending = 0
+        self._lock = threading.Lock()          # guards the buffers
+        self._flush_lock = threading.Lock()    # one flush at a time, in add order
+        self._last_flush = time.monotonic()
+
+    def add(self, collection, op):
+        with self._lock:
+            self._ops[collection].append(op)
+            self._pending += 1
+            due = self._pending >= self.batch_size or \
+                time.monotonic() - self._last_flush >= self.flush_seconds
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write everything queued so far; returns the number of ops written."""
+        with self._flush_lock:
+            with self._lock:
+                batches, self._ops = self._ops, defaultdict(list)
+                self._pending = 0
+                self._last_flush = time.monotonic()
+            written = 0
+            for collection, ops in batches.items():
+                written += self._write(collection, ops)
+            self.written += written
+            self.flushes += bool(batches)
+            return written
+
+    def _write(self, collection, ops):
+        written = 0
+        while ops:
+            try:
+                result = self.db[collection].bulk_write(ops, ordered=self.ordered)
+                return written + _count(result.bulk_api_result)
+            except BulkWriteError as e:
+                written += _count(e.details)
+                failed = sorted(err["index"] for err in e.details.get("writeErrors", []))
+                for err in e.details.get("writeErrors", []):
+                    self._record(collection, ops[err["index"]], err.get("errmsg", str(err)))
+                if not self.ordered or not failed:
+                    return written
+                ops = ops[failed[-1] + 1:]           # ordered: resume after the failure
+            except PyMongoError as e:                # whole batch lost (network, auth, ...)
+                for op in ops:
+                    self._record(collection, op, f"{type(e).__name__}: {e}")
+                return written
+        return written
+
+    def _record(self, collection, op, message):
+        doc = getattr(op, "_doc", None) or {}
+        pid = (getattr(op, "_filter", None) or {}).get("pubmed_id") \
+            or doc.get("$set", doc).get("pubmed_id")
+        self.errors.append({
+            "stage": "bulk_write",
+            "collection": collection,
+            "pubmed_id": pid,
+            "error": message,
+            "timestamp": datetime.now(),
+        })
+
+    def close(self):
+        return self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _count(result):
+    return sum(result.get(k, 0) for k in ("nInserted", "nUpserted", "nMatched", "nRemoved"))
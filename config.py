@@ -6,6 +6,15 @@ load_dotenv()
 
 # MongoDB connection string
 MONGO_URI = os.getenv("MONGO_URI")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "research_papers")
+# shared per-process client (mongo_client.py)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 50))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 0))    # 0 = no timeout
+# primary | primaryPreferred | secondary | secondaryPreferred | nearest
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
 
 # PubMed API key
 NCBI_API_KEY = os.getenv("NCBI_API_KEY")
@@ -18,3 +27,74 @@ ABBREVS_CSV = os.getenv("ABBREVS_CSV", "input data/abbreviations.csv")
 
 # Other configs
 MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", 2))
+PDF_TEXT_ENGINE = os.getenv("PDF_TEXT_ENGINE", "pymupdf").lower()   # pymupdf | pypdf2
+# stop reading pages for tagging once this many characters are in (0 = read all MAX_PDF_PAGES)
+PDF_TEXT_MAX_CHARS = int(os.getenv("PDF_TEXT_MAX_CHARS", 0))
+# pages the web UI extracts per "load more" click
+PDF_PAGES_PER_REQUEST = int(os.getenv("PDF_PAGES_PER_REQUEST", 2))
+PDF_SANDBOX = os.getenv("PDF_SANDBOX", "true").lower() in ("1", "true", "yes")
+PDF_EXTRACT_TIMEOUT = float(os.getenv("PDF_EXTRACT_TIMEOUT", 60))    # seconds per PDF
+PDF_EXTRACT_MAX_MB = int(os.getenv("PDF_EXTRACT_MAX_MB", 1024))     # worker RSS ceiling
+PDF_WORKER_MAX_FILES = int(os.getenv("PDF_WORKER_MAX_FILES", 50))   # recycle after N PDFs
+EFETCH_BATCH_SIZE = int(os.getenv("EFETCH_BATCH_SIZE", 200))
+EFETCH_HISTORY_BATCH_SIZE = int(os.getenv("EFETCH_HISTORY_BATCH_SIZE", 500))
+ENTREZ_USE_HISTORY = os.getenv("ENTREZ_USE_HISTORY", "true").lower() in ("1", "true", "yes")
+# hits kept per keyword search; any beyond it are reported, not silently dropped
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", 1000))
+# PMIDs already in Mongo: refresh (stamp last_seen, re-export) | skip | full (reprocess)
+KNOWN_ARTICLE_POLICIES = ("refresh", "skip", "full")
+KNOWN_ARTICLE_POLICY = os.getenv("KNOWN_ARTICLE_POLICY", "refresh").strip().lower()
+if KNOWN_ARTICLE_POLICY not in KNOWN_ARTICLE_POLICIES:
+    raise ValueError(f"KNOWN_ARTICLE_POLICY={KNOWN_ARTICLE_POLICY!r}; "
+                     f"expected one of {', '.join(KNOWN_ARTICLE_POLICIES)}")
+
+# Concurrency / HTTP
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", 5))
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", os.cpu_count() or 1))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", MAX_WORKERS))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 4))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", 1.0))
+
+# Buffered Mongo writes (bulk_writer.py)
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", 500))
+BULK_FLUSH_SECONDS = float(os.getenv("BULK_FLUSH_SECONDS", 5))
+BULK_ORDERED = os.getenv("BULK_ORDERED", "true").lower() in ("1", "true", "yes")
+
+# Review page: seconds to reuse the nav-pill counts (0 = count on every page load)
+NAV_COUNTS_TTL = float(os.getenv("NAV_COUNTS_TTL", 30))
+
+# NCBI E-utilities: 3 req/s without an API key, 10 req/s with one
+NCBI_RATE_LIMIT = float(os.getenv("NCBI_RATE_LIMIT", 10 if NCBI_API_KEY else 3))
+
+# On-disk cache for raw E-utilities / OA responses
+CACHE_DIR = os.getenv("CACHE_DIR", "cache")
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_OFFLINE = os.getenv("CACHE_OFFLINE", "false").lower() in ("1", "true", "yes")
+CACHE_MAX_BYTES = int(float(os.getenv("CACHE_MAX_MB", 1024)) * 1024 * 1024)
+CACHE_TTL = {                                   # seconds
+    "esearch": int(os.getenv("CACHE_TTL_ESEARCH", 3600)),
+    "efetch": int(os.getenv("CACHE_TTL_EFETCH", 30 * 24 * 3600)),
+    "oa": int(os.getenv("CACHE_TTL_OA", 7 * 24 * 3600)),
+}
+
+# asyncio stage engine (pipeline.py)
+USE_ASYNC_PIPELINE = os.getenv("USE_ASYNC_PIPELINE", "false").lower() in ("1", "true", "yes")
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 50))
+PIPELINE_CONCURRENCY = {                        # workers per stage
+    stage: int(os.getenv(f"PIPELINE_{stage.upper()}_CONCURRENCY", default))
+    for stage, default in (
+        ("prepare", 4),
+        ("download", MAX_WORKERS),
+        ("extract", CPU_WORKERS),
+        ("tag", CPU_WORKERS),
+        ("persist", 4),
+    )
+}
+PIPELINE_TAG_BATCH_SIZE = int(os.getenv("PIPELINE_TAG_BATCH_SIZE", 32))   # max articles per tag_articles call
+
+# Tagging
+TAG_ENGINE = os.getenv("TAG_ENGINE", "yake").lower()                       # yake | tfidf
+TFIDF_MODEL_PATH = os.getenv("TFIDF_MODEL_PATH", os.path.join("models", "tfidf_model.npz"))
+TAG_MAX_FULLTEXT_TOKENS = int(os.getenv("TAG_MAX_FULLTEXT_TOKENS", 1500))  # of full text, after title + abstract
+TAG_CACHE_SIZE = int(os.getenv("TAG_CACHE_SIZE", 4096))                    # in-process LRU entries
+TAG_BATCH_PARALLEL_MIN = int(os.getenv("TAG_BATCH_PARALLEL_MIN", 8))       # fan a batch out to cpu_pool from here
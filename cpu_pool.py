@@ -0,0 +1,49 @@
+import concurrent.futures
+import multiprocessing
+import threading
+from config import CPU_WORKERS
+
+# -------------------- CPU-stage process pool --------------------
+#
+# PDF text extraction and YAKE tagging are pure-Python CPU work; run on the
+# I/O threads they serialize on the GIL.  This pool moves them into worker
+# processes (one per core by default).  Each worker builds its YAKE
+# extractor (and loads the TF-IDF model, if selected) once in the
+# initializer and reuses it for every document.
+#
+# The pool is first used from threaded code (I/O worker threads, pymongo's
+# monitor threads), so workers are spawned rather than forked, as in
+# pdf_sandbox: forking a multi-threaded parent can deadlock the child.
+
+_pool = None
+_lock = threading.Lock()
+
+def _init_worker():
+    import tag_utils
+    tag_utils.get_extractor()
+    if tag_utils.TAG_ENGINE == "tfidf":
+        import tfidf_tags
+        tfidf_tags.get_model()
+
+def get_cpu_pool():
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=CPU_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+    return _pool
+
+def run_cpu(fn, *args):
+    """Run fn(*args) in the CPU pool and block for the result."""
+    return get_cpu_pool().submit(fn, *args).result()
+
+def shutdown_cpu_pool():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,193 @@
+"""
+db_migrations.py  ·  Versioned indexes / schema changes for research_papers
+---------------------------------------------------------------------------
+init_db() calls apply_migrations() on every start; each migration runs once
+and is recorded in the schema_migrations collection ({_id: version}).  Add
+new changes as a new version at the end of MIGRATIONS, never by editing an
+applied one.
+
+The indexes follow the queries the code actually runs:
+
+    app.index           status / access+status / approved_tags filters,
+                        sorted by publication_date desc; nav-pill counts
+    app.analytics       status / access counts, PDFs on file (pdf_file)
+    SciCom / stages     articles by pubmed_id (single and $in),
+                        article_text by pubmed_id (+ text_key)
+    db_utils            last completed run_logs entry by end_time
+    recompute_titles    articles.title_words ($all)
+
+check_query_plans() explains each shape in KNOWN_QUERIES and reports any
+that still scan the whole collection:
+
+    python db_migrations.py            # apply pending migrations
+    python db_migrations.py --check    # exit 1 if a known query does a COLLSCAN
+"""
+
+import sys
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+
+class MigrationError(Exception):
+    pass
+
+
+def _key(spec):
+    return tuple((field, kind if isinstance(kind, str) else int(kind))
+                 for field, kind in spec["key"].items())
+
+
+def _create(db, collection, *indexes):
+    """
+    Create `indexes` (IndexModels, default names).  An index that already
+    exists with the same key, under whatever name (setup_text_index.py,
+    older recompute_titles runs), is adopted instead of created again.
+    """
+    existing = {_key(spec): spec for spec in db[collection].list_indexes()}
+    missing = []
+    for model in indexes:
+        spec = existing.get(_key(model.document))
+        if spec is None:
+            missing.append(model)
+        elif model.document.get("unique") and not spec.get("unique"):
+            raise MigrationError(
+                f"{collection} index {spec['name']} is not unique; drop it and re-run")
+    if missing:
+        db[collection].create_indexes(missing)
+
+
+def _unique_pubmed_id(collection):
+    def migrate(db):
+        dupes = list(db[collection].aggregate([
+            {"$group": {"_id": "$pubmed_id", "n": {"$sum": 1}}},
+            {"$match": {"n": {"$gt": 1}}},
+            {"$limit": 10},
+        ]))
+        if dupes:
+            raise MigrationError(
+                f"{collection} has duplicate pubmed_ids (e.g. {[d['_id'] for d in dupes]}); "
+                f"remove the duplicates and re-run")
+        _create(db, collection, IndexModel([("pubmed_id", ASCENDING)], unique=True))
+    return migrate
+
+
+def _review_indexes(db):
+    _create(
+        db, "articles",
+        IndexModel([("status", ASCENDING), ("publication_date", DESCENDING)]),
+        IndexModel([("access", ASCENDING), ("status", ASCENDING),
+                    ("publication_date", DESCENDING)]),
+        IndexModel([("approved_tags", ASCENDING), ("publication_date", DESCENDING)]),
+        IndexModel([("publication_date", DESCENDING)]),
+        IndexModel([("keywords", ASCENDING)]),
+    )
+
+
+def _run_log_indexes(db):
+    _create(db, "run_logs",
+            IndexModel([("status", ASCENDING), ("end_time", DESCENDING)]))
+
+
+def _title_words_index(db):
+    _create(db, "articles", IndexModel([("title_words", ASCENDING)]))
+
+
+def _pdf_file_index(db):
+    # the analytics suffix regex still walks the index, but not the documents
+    _create(db, "articles", IndexModel([("pdf_file", ASCENDING)]))
+
+
+# (version, description, migrate(db)) — append only
+MIGRATIONS = [
+    (1, "unique article_text.pubmed_id", _unique_pubmed_id("article_text")),
+    (2, "unique articles.pubmed_id", _unique_pubmed_id("articles")),
+    (3, "articles review-page indexes", _review_indexes),
+    (4, "run_logs status/end_time", _run_log_indexes),
+    (5, "articles.title_words multikey", _title_words_index),
+    (6, "articles.pdf_file", _pdf_file_index),
+]
+
+
+def applied_versions(db):
+    return {doc["_id"] for doc in db["schema_migrations"].find({}, {"_id": 1})}
+
+
+def apply_migrations(db):
+    """Run every migration not yet recorded; returns the versions applied now."""
+    done = applied_versions(db)
+    applied = []
+    for version, description, migrate in MIGRATIONS:
+        if version in done:
+            continue
+        migrate(db)
+        db["schema_migrations"].insert_one({
+            "_id": version,
+            "description": description,
+            "applied_at": datetime.now(),
+        })
+        print(f"🗂️  Applied migration {version}: {description}")
+        applied.append(version)
+    return applied
+
+
+# -------------------- Query-plan check --------------------
+
+# (collection, filter, sort) for every query shape the app and scraper run
+KNOWN_QUERIES = [
+    ("articles", {"pubmed_id": "0"}, None),
+    ("articles", {"pubmed_id": {"$in": ["0", "1"]}}, None),
+    ("articles", {"$or": [{"status": {"$exists": False}}, {"status": "Pending"}]},
+     [("publication_date", -1)]),
+    ("articles", {"access": "Free", "status": "Pending"}, [("publication_date", -1)]),
+    ("articles", {"access": "Paid", "status": "Pending"}, [("publication_date", -1)]),
+    ("articles", {"status": "approved"}, [("publication_date", -1)]),
+    ("articles", {"status": "approved", "approved_tags": "TAVI"}, [("publication_date", -1)]),
+    ("articles", {"access": "Free"}, None),
+    ("articles", {"status": {"$exists": False}}, None),
+    ("articles", {"pdf_file": {"$regex": r"\.pdf$"}}, None),
+    ("articles", {"title_words": {"$all": ["aortic", "valve"]}}, None),
+    ("article_text", {"pubmed_id": "0", "text_key": "x"}, None),
+    ("run_logs", {"status": "completed", "articles_processed": {"$gt": 0}},
+     [("end_time", -1)]),
+]
+
+
+def plan_stages(plan):
+    """Every stage name in an explain() plan tree (winningPlan or queryPlanner)."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for key, value in plan.items():
+            if key in ("inputStage", "inputStages", "queryPlan", "winningPlan"):
+                for child in value if isinstance(value, list) else [value]:
+                    stages.extend(plan_stages(child))
+    return stages
+
+
+def check_query_plans(db, queries=KNOWN_QUERIES):
+    """Return [(collection, filter)] for known queries whose plan has a COLLSCAN."""
+    offenders = []
+    for collection, query, sort in queries:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in plan_stages(plan):
+            offenders.append((collection, query))
+    return offenders
+
+
+if __name__ == "__main__":
+    from db_utils import connect_to_mongo
+    db = connect_to_mongo()
+    if "--check" in sys.argv:
+        bad = check_query_plans(db)
+        for collection, query in bad:
+            print(f"❌ COLLSCAN: {collection} {query}")
+        print("✅ every known query uses an index" if not bad else "")
+        sys.exit(1 if bad else 0)
+    applied = apply_migrations(db)
+    print(f"✅ {len(applied)} migrations applied; schema at version "
+          f"{max(applied_versions(db), default=0)}")
@@ -1,18 +1,17 @@
-from pymongo import MongoClient
 import csv
 from datetime import datetime
 import os
-from config import MONGO_URI, KEYWORDS_CSV, ABBREVS_CSV 
+from config import KEYWORDS_CSV, ABBREVS_CSV 
+from mongo_client import get_db
+from db_migrations import apply_migrations
 
 
 def connect_to_mongo():
     """
-    Connect to the local MongoDB.
+    Connect to MongoDB through the shared per-process client (mongo_client.py).
     Returns a reference to the 'research_papers' database.
     """
-    client = MongoClient(MONGO_URI)
-    db = client["research_papers"]
-    return db
+    return get_db()
 
 def import_keywords(db):
     """
@@ -59,7 +58,8 @@ def import_abbreviations(db):
 def init_db():
     """
     Initialize the database by ensuring required collections exist,
-    and merge in updated keywords/abbreviations from CSV each time.
+    applying pending index migrations (db_migrations.py), and merging in
+    updated keywords/abbreviations from CSV each time.
     """
     db = connect_to_mongo()
     required_collections = ["articles", "keywords", "abbreviations", "run_logs"]
@@ -69,6 +69,7 @@ def init_db():
             db.create_collection(coll)
             print(f"Created collection: {coll}")
 
+    apply_migrations(db)
     import_keywords(db)
     import_abbreviations(db)
 
@@ -0,0 +1,101 @@
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from config import HTTP_POOL_SIZE, HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE
+
+# -------------------- Shared HTTP session --------------------
+#
+# One requests.Session for the whole process.  Its adapter keeps a
+# keep-alive connection pool per host (eutils, www.ncbi, ftp.ncbi, ...),
+# sized by HTTP_POOL_SIZE to match the worker count in SciCom, so repeat
+# calls skip the TCP/TLS handshake.  get()/post() are drop-in replacements
+# for requests.get/post with retry, backoff and optional rate limiting.
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+_timing_hooks = []
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=8,          # number of hosts kept pooled
+                    pool_maxsize=HTTP_POOL_SIZE, # keep-alive connections per host
+                    max_retries=0,               # retries are handled in request()
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+def add_timing_hook(hook):
+    """
+    Register hook(method, url, status, elapsed_seconds, attempt). It is
+    called after every attempt; status is None when the request raised.
+    """
+    _timing_hooks.append(hook)
+
+def remove_timing_hook(hook):
+    if hook in _timing_hooks:
+        _timing_hooks.remove(hook)
+
+def _fire_hooks(method, url, status, elapsed, attempt):
+    for hook in list(_timing_hooks):
+        try:
+            hook(method, url, status, elapsed, attempt)
+        except Exception as e:
+            print(f"⚠️ HTTP timing hook failed: {e}")
+
+def _backoff(attempt, response=None):
+    """Retry-After when the server sends one, else exponential backoff with full jitter."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return float(retry_after)
+    return random.uniform(0, HTTP_BACKOFF_BASE * (2 ** attempt))
+
+def request(method, url, limiter=None, max_retries=HTTP_MAX_RETRIES, **kwargs):
+    """
+    Send a request on the shared session. 429/5xx responses and connection
+    errors are retried up to `max_retries` times; the final response is
+    returned as-is (callers still raise_for_status()). `limiter` is a
+    rate_limit.TokenBucket acquired before every attempt.
+    """
+    session = get_session()
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        t0 = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            _fire_hooks(method, url, None, time.perf_counter() - t0, attempt)
+            if attempt == max_retries:
+                raise
+            delay = _backoff(attempt)
+            print(f"[retry] {method} {url} failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        _fire_hooks(method, url, response.status_code, time.perf_counter() - t0, attempt)
+        if response.status_code in RETRY_STATUSES and attempt < max_retries:
+            delay = _backoff(attempt, response)
+            print(f"[{response.status_code}] {method} {url}; retrying in {delay:.1f}s "
+                  f"(Attempt {attempt+1})")
+            response.close()
+            time.sleep(delay)
+            continue
+        return response
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+
+from pymongo import MongoClient, monitoring
+from pymongo.errors import PyMongoError
+
+from config import (MONGO_URI, MONGO_DB_NAME, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE,
+                    MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS,
+                    MONGO_SOCKET_TIMEOUT_MS, MONGO_READ_PREFERENCE)
+
+# -------------------- Shared MongoClient --------------------
+#
+# A MongoClient owns a connection pool and background monitor threads, so
+# it is meant to be created once per process and shared.  get_client()
+# keeps one client per URI for the current process; app.py, db_utils and
+# SciCom all go through it instead of calling MongoClient() per request.
+#
+# Clients are not fork-safe: a child inheriting the parent's client would
+# share its sockets.  The registry remembers the pid that built it and
+# starts empty in a forked child (gunicorn workers, multiprocessing), so
+# each process connects lazily on first use.
+#
+# A command listener counts commands and their latency per command name;
+# health() pings the server and returns those stats for the /health route.
+
+_clients = {}
+_pid = os.getpid()
+_lock = threading.Lock()
+
+
+class CommandStats(monitoring.CommandListener):
+    """Count, failures and total/max latency per command name (thread safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def _record(self, event, failed):
+        ms = event.duration_micros / 1000
+        with self._lock:
+            s = self._stats.setdefault(event.command_name,
+                                       {"count": 0, "failed": 0, "total_ms": 0.0, "max_ms": 0.0})
+            s["count"] += 1
+            s["failed"] += failed
+            s["total_ms"] += ms
+            s["max_ms"] = max(s["max_ms"], ms)
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, False)
+
+    def failed(self, event):
+        self._record(event, True)
+
+    def summary(self):
+        with self._lock:
+            return {name: {"count": s["count"],
+                           "failed": s["failed"],
+                           "avg_ms": round(s["total_ms"] / s["count"], 2),
+                           "max_ms": round(s["max_ms"], 2)}
+                    for name, s in self._stats.items()}
+
+
+command_stats = CommandStats()
+
+
+def _reset_after_fork():
+    global _pid, _lock
+    _clients.clear()            # the parent's clients belong to the parent
+    _pid = os.getpid()
+    _lock = threading.Lock()
+    command_stats.reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _new_client(uri):
+    return MongoClient(
+        uri,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS or None,
+        readPreference=MONGO_READ_PREFERENCE,
+        event_listeners=[command_stats],
+        connect=False,          # first operation connects, not import/fork time
+    )
+
+
+def get_client(uri=None):
+    uri = uri or MONGO_URI or "mongodb://localhost:27017/"
+    if os.getpid() != _pid:     # forked without register_at_fork
+        _reset_after_fork()
+    client = _clients.get(uri)
+    if client is None:
+        with _lock:
+            client = _clients.get(uri)
+            if client is None:
+                client = _clients[uri] = _new_client(uri)
+    return client
+
+
+def get_db(name=MONGO_DB_NAME, uri=None):
+    return get_client(uri)[name]
+
+
+def health(uri=None):
+    """Ping the server; returns a dict with ok, ping latency, pool settings and command stats."""
+    client = get_client(uri)
+    t0 = time.perf_counter()
+    try:
+        client.admin.command("ping")
+        ok, error = True, None
+    except PyMongoError as e:
+        ok, error = False, f"{type(e).__name__}: {e}"
+    return {
+        "ok": ok,
+        "error": error,
+        "ping_ms": round((time.perf_counter() - t0) * 1000, 2),
+        "pid": os.getpid(),
+        "pool": {
+            "max_size": MONGO_MAX_POOL_SIZE,
+            "min_size": MONGO_MIN_POOL_SIZE,
+            "read_preference": MONGO_READ_PREFERENCE,
+        },
+        "commands": command_stats.summary(),
+    }
+
+
+def close_clients():
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
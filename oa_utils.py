@@ -0,0 +1,71 @@
+import threading
+import xml.etree.ElementTree as ET
+import requests
+import response_cache
+from rate_limit import ncbi_limiter
+
+# -------------------- PMC Open Access resolver --------------------
+#
+# One oa.fcgi lookup per PMCID per run: fetch_pubmed_details uses the
+# record for Free/Paid and pdf_utils uses the pdf/tgz links from the same
+# record instead of calling the service a second time.
+
+OA_URL = "https://www.ncbi.nlm.nih.gov/pmc/utils/oa/oa.fcgi"
+
+_records = {}
+_lock = threading.Lock()
+
+def resolve_oa(pmcid):
+    """
+    Return the OA record for `pmcid`:
+    {"pmcid", "access" ("Free"/"Paid"), "pdf_href", "tgz_href", "license"}.
+    Successful lookups are memoized until clear_oa_cache(); failed lookups
+    come back as Paid with an "error" key and are retried next time.  An
+    offline-mode cache miss says nothing about the article, so its access
+    is None (callers leave the stored value alone).
+    """
+    with _lock:
+        if pmcid in _records:
+            return _records[pmcid]
+
+    record = {
+        "pmcid": pmcid,
+        "access": "Paid",
+        "pdf_href": None,
+        "tgz_href": None,
+        "license": None,
+    }
+    try:
+        body = response_cache.fetch("GET", OA_URL, "oa", params={"id": pmcid},
+                                    timeout=15, limiter=ncbi_limiter)
+        root = ET.fromstring(body)
+    except response_cache.CacheMiss as e:
+        print(f"OA API check skipped for {pmcid}: {e}")
+        record["access"] = None
+        record["error"] = str(e)
+        return record
+    except (requests.exceptions.RequestException, ET.ParseError) as e:
+        print(f"OA API check failed for {pmcid}: {e}")
+        record["error"] = str(e)
+        return record
+
+    oa_record = root.find(".//record")
+    if oa_record is not None:
+        record["license"] = oa_record.get("license")
+        for link in oa_record.findall("link"):
+            fmt = link.get("format")
+            if fmt == "pdf" and record["pdf_href"] is None:
+                record["pdf_href"] = link.get("href")
+            elif fmt == "tgz" and record["tgz_href"] is None:
+                record["tgz_href"] = link.get("href")
+        if record["pdf_href"] or record["tgz_href"]:
+            record["access"] = "Free"
+
+    with _lock:
+        _records[pmcid] = record
+    return record
+
+def clear_oa_cache():
+    """Forget memoized OA records (called at the start of every run)."""
+    with _lock:
+        _records.clear()
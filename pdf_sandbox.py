@@ -0,0 +1,209 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from config import (
+    CPU_WORKERS,
+    PDF_EXTRACT_TIMEOUT,
+    PDF_EXTRACT_MAX_MB,
+    PDF_WORKER_MAX_FILES,
+)
+
+# -------------------- Sandboxed PDF text extraction --------------------
+#
+# Every PDF is extracted in a separate worker process with a wall-clock
+# timeout and a memory ceiling, so one malformed file can no longer hang or
+# bloat the whole run.  On Linux the parent polls the worker's RSS while it
+# waits and kills it past PDF_EXTRACT_MAX_MB; on POSIX RLIMIT_AS is also set
+# to twice that as a backstop (allocations then fail with MemoryError).  On Windows only
+# the timeout applies.  Workers are spawned fresh (no fork of a threaded
+# parent) and recycled after PDF_WORKER_MAX_FILES files.
+
+_spawn = multiprocessing.get_context("spawn")
+_POLL_SECONDS = 0.25
+
+
+class ExtractionFailed(Exception):
+    """
+    Raised by SandboxPool.extract. `kind` is "timeout", "memory", "crashed"
+    or "exception"; `as_error()` gives the structured run_logs entry.
+    """
+
+    def __init__(self, pdf_file, kind, message, elapsed):
+        super().__init__(f"{kind}: {message}")
+        self.pdf_file = pdf_file
+        self.kind = kind
+        self.message = message
+        self.elapsed = elapsed
+
+    def as_error(self):
+        return {
+            "stage": "pdf_extract",
+            "kind": self.kind,
+            "pdf_file": self.pdf_file,
+            "error": self.message,
+            "elapsed": round(self.elapsed, 2),
+            "timestamp": datetime.now(),
+        }
+
+
+def _worker_main(conn, max_bytes):
+    try:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (2 * max_bytes, 2 * max_bytes))
+    except (ImportError, ValueError, OSError):
+        pass                                   # Windows / restricted: timeout only
+
+    from pdf_text_utils import extract_pdf_text, extract_pdf_pages
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        try:
+            # strict: an unreadable PDF comes back as an "exception" result,
+            # not as empty text that would be stored as if it were current
+            if isinstance(job, tuple):             # (path, start, stop): page list
+                conn.send(("ok", extract_pdf_pages(*job, strict=True)))
+            else:
+                conn.send(("ok", extract_pdf_text(job, strict=True)))
+        except MemoryError:
+            conn.send(("memory", "exceeded memory limit"))
+        except Exception as e:
+            conn.send(("exception", f"{type(e).__name__}: {e}"))
+
+
+def _rss_bytes(pid):
+    """Resident set size of `pid` from /proc, or None where unavailable."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class _Worker:
+    def __init__(self, max_bytes):
+        self.conn, child_conn = _spawn.Pipe()
+        self.process = _spawn.Process(target=_worker_main, args=(child_conn, max_bytes),
+                                      daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.files = 0
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+    def stop(self):
+        if self.process.is_alive():
+            try:
+                self.conn.send(None)
+                self.process.join(timeout=5)
+            except (OSError, BrokenPipeError):
+                pass
+        self.kill()
+
+
+class SandboxPool:
+    """
+    `size` extraction workers shared by any number of threads; extract()
+    blocks until a worker is free.
+    """
+
+    def __init__(self, size=CPU_WORKERS, timeout=PDF_EXTRACT_TIMEOUT,
+                 max_mb=PDF_EXTRACT_MAX_MB, max_files=PDF_WORKER_MAX_FILES):
+        self.timeout = timeout
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_files = max_files
+        self._idle = queue.Queue()
+        for _ in range(size):
+            self._idle.put(None)               # workers start lazily
+
+    def extract(self, pdf_file):
+        """Return the extracted text or raise ExtractionFailed."""
+        return self._submit(pdf_file, pdf_file)
+
+    def extract_pages(self, pdf_file, start, stop):
+        """Return the texts of pages [start, stop) or raise ExtractionFailed."""
+        return self._submit(pdf_file, (pdf_file, start, stop))
+
+    def _submit(self, pdf_file, job):
+        worker = self._idle.get()
+        try:
+            if worker is None:
+                worker = _Worker(self.max_bytes)
+            return self._run(worker, pdf_file, job)
+        finally:
+            if worker is not None and (not worker.process.is_alive()
+                                       or worker.files >= self.max_files):
+                worker.stop()                  # replace dead / recycle used-up workers
+                worker = None
+            self._idle.put(worker)
+
+    def _run(self, worker, pdf_file, job):
+        started = time.monotonic()
+        worker.files += 1
+        try:
+            worker.conn.send(job)
+            while True:
+                elapsed = time.monotonic() - started
+                if elapsed >= self.timeout:
+                    kind, message = "timeout", f"no result after {self.timeout}s"
+                    break
+                if worker.conn.poll(min(_POLL_SECONDS, self.timeout - elapsed)):
+                    status, payload = worker.conn.recv()
+                    if status == "ok":
+                        return payload
+                    if status == "exception":     # worker is still healthy
+                        raise ExtractionFailed(pdf_file, status, payload,
+                                               time.monotonic() - started)
+                    kind, message = status, payload
+                    break
+                rss = _rss_bytes(worker.process.pid)
+                if rss is not None and rss > self.max_bytes:
+                    kind, message = "memory", f"RSS {rss // (1024 * 1024)} MB over limit"
+                    break
+                if not worker.process.is_alive():
+                    kind, message = "crashed", f"worker exited with code {worker.process.exitcode}"
+                    break
+        except (EOFError, OSError, BrokenPipeError) as e:
+            kind, message = "crashed", f"worker connection lost: {e}"
+
+        worker.kill()
+        raise ExtractionFailed(pdf_file, kind, message, time.monotonic() - started)
+
+    def close(self):
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            if worker is not None:
+                worker.stop()
+
+
+_sandbox = None
+_lock = threading.Lock()
+
+def get_sandbox():
+    global _sandbox
+    if _sandbox is None:
+        with _lock:
+            if _sandbox is None:
+                _sandbox = SandboxPool()
+    return _sandbox
+
+def shutdown_sandbox():
+    global _sandbox
+    with _lock:
+        if _sandbox is not None:
+            _sandbox.close()
+            _sandbox = None
@@ -1,17 +1,113 @@
-import PyPDF2
-from config import MAX_PDF_PAGES
+import hashlib
+import itertools
+import os
+from config import MAX_PDF_PAGES, PDF_TEXT_ENGINE, PDF_TEXT_MAX_CHARS
 
-def extract_pdf_text(file_path):
+# -------------------- PDF text extraction backends --------------------
+#
+# PyMuPDF (fitz) is the default: it is many times faster than PyPDF2 and
+# returns text for far more of our PDFs.  PyPDF2 stays available as a
+# fallback, used when PyMuPDF is not installed or cannot open a file.
+# Engines are page generators, so nothing past the last page a caller
+# consumes is ever parsed.
+
+def _pages_pymupdf(file_path, start):
+    try:
+        import pymupdf
+    except ImportError:                  # PyMuPDF < 1.24 only ships "fitz"
+        import fitz as pymupdf
+    with pymupdf.open(file_path) as doc:
+        for i in range(start, doc.page_count):
+            yield doc[i].get_text() or ""
+
+def _pages_pypdf2(file_path, start):
+    import PyPDF2
+    with open(file_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        for i in range(start, len(reader.pages)):
+            yield reader.pages[i].extract_text() or ""
+
+# engine name -> generator of page texts from page `start` onwards
+ENGINES = {
+    "pymupdf": _pages_pymupdf,
+    "pypdf2": _pages_pypdf2,
+}
+
+def iter_pdf_pages(file_path, start=0, engine=None, strict=False):
     """
-    Return text from the first MAX_PDF_PAGES pages of the PDF.
+    Lazily yield the text of each page from page `start` (0-based) onwards.
+    Pages are only parsed when the consumer asks for them, so callers can
+    stop as soon as they have enough text. If the engine fails, PyPDF2
+    picks up at the page where it stopped.  When every engine fails the
+    generator just ends, or re-raises the last error with `strict`.
     """
-    parts = []
-    try:
-        with open(file_path, "rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            pages = min(len(reader.pages), MAX_PDF_PAGES)
-            for i in range(pages):
-                parts.append(reader.pages[i].extract_text() or "")
-    except Exception as e:
-        print(f"⚠️ Could not read {file_path}: {e}")
+    engine = engine or PDF_TEXT_ENGINE
+    order = [engine] + [name for name in ("pypdf2",) if name != engine]
+    page = start
+    error = None
+
+    for name in order:
+        try:
+            for text in ENGINES[name](file_path, page):
+                page += 1
+                yield text
+            return
+        except ImportError as e:
+            print(f"⚠️ PDF engine '{name}' unavailable: {e}")
+            error = e
+        except MemoryError:
+            raise                        # let the sandbox report it
+        except Exception as e:
+            print(f"⚠️ Could not read {file_path} with {name}: {e}")
+            error = e
+    if strict and error is not None:
+        raise error
+
+def extract_pdf_text(file_path, engine=None, max_pages=None, max_chars=None, strict=False):
+    """
+    Return text from the first MAX_PDF_PAGES pages of the PDF, using
+    `engine` (default PDF_TEXT_ENGINE) and falling back to PyPDF2.
+    Reading stops early once `max_chars` (default PDF_TEXT_MAX_CHARS,
+    0 = no limit) characters are collected.  With `strict`, an error from
+    the last engine is raised instead of ending the text early.
+    """
+    if not os.path.isfile(file_path):
+        print(f"⚠️ Could not read {file_path}: no such file")
+        return ""
+
+    max_pages = MAX_PDF_PAGES if max_pages is None else max_pages
+    max_chars = PDF_TEXT_MAX_CHARS if max_chars is None else max_chars
+    parts, chars = [], 0
+    for text in itertools.islice(iter_pdf_pages(file_path, engine=engine, strict=strict),
+                                  max_pages):
+        parts.append(text)
+        chars += len(text)
+        if max_chars and chars >= max_chars:
+            break
     return "\n".join(parts).strip()
+
+def extract_pdf_pages(file_path, start, stop, engine=None, strict=False):
+    """Return the texts of pages [start, stop) (fewer at the end of the document)."""
+    if not os.path.isfile(file_path):
+        return []
+    return list(itertools.islice(iter_pdf_pages(file_path, start, engine, strict),
+                                 stop - start))
+
+def pdf_text_key(file_path, engine=None, max_pages=None):
+    """
+    Cache key for the extracted text of `file_path`: SHA-256 of the PDF bytes
+    plus the engine and page/character limits, so changing any of them
+    invalidates it.  Pass max_pages="all" for the per-page cache, which
+    has no limit.  Paths that are not files all share the "no-pdf" key.
+    """
+    engine = engine or PDF_TEXT_ENGINE
+    max_pages = MAX_PDF_PAGES if max_pages is None else max_pages
+    if max_pages != "all" and PDF_TEXT_MAX_CHARS:
+        max_pages = f"{max_pages}:{PDF_TEXT_MAX_CHARS}"
+    if not file_path or not os.path.isfile(file_path):
+        return f"no-pdf|{engine}|{max_pages}"
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return f"{h.hexdigest()}|{engine}|{max_pages}"
@@ -1,8 +1,9 @@
 import os, time, requests, shutil, io, tarfile, urllib.parse
 from bs4 import BeautifulSoup
+import http_client
 from config import PDF_DIR
 from utils import sanitize_filename
-import xml.etree.ElementTree as ET
+from oa_utils import resolve_oa
 
 # Only use Method 2: PMCID-based download from PubMed Central OA
 
@@ -17,46 +18,62 @@ def download_pmc_pdf(pmcid, filename=None):
     return download_pmc_pdf_oa(pmcid, filename)
 
 def download_pmc_pdf_oa(pmcid, filename):
-    oa_url = f"https://www.ncbi.nlm.nih.gov/pmc/utils/oa/oa.fcgi?id={pmcid}"
-    try:
-        root = ET.fromstring(requests.get(oa_url, timeout=15).text)
-    except Exception as e:
-        print(f"OA API failed for {pmcid}: {e}")
-        return None
+    record = resolve_oa(pmcid)
+    if record["pdf_href"]:
+        return _stream_pmc_pdf(record["pdf_href"], filename)
 
-    link = root.find(".//record/link[@format='pdf']")
-    if link is not None:
-        return _stream_pmc_pdf(link.attrib["href"], filename)
-
-    tgz = root.find(".//record/link[@format='tgz']")
-    if tgz is None:
+    if not record["tgz_href"]:
         return None
 
-    tgz_url = tgz.attrib["href"]
+    tgz_url = record["tgz_href"]
     if tgz_url.startswith("ftp://"):
         tgz_url = tgz_url.replace("ftp://", "https://", 1)
-    buf = io.BytesIO(requests.get(tgz_url, timeout=30).content)
-
-    with tarfile.open(fileobj=buf, mode="r:gz") as tar:
-        member = next((m for m in tar.getmembers() if m.name.lower().endswith(".pdf")), None)
-        if member:
-            with tar.extractfile(member) as pdf_file:
-                return _save_stream(pdf_file, filename)
+    return _stream_pmc_tgz(tgz_url, pmcid, filename)
+
+def _stream_pmc_tgz(tgz_url, pmcid, filename):
+    """
+    Walk the OA package as a gzip stream ("r|gz") and save the first .pdf
+    member, without buffering the archive (often 50-200 MB of figures and
+    supplements) in memory or reading past that member.
+    """
+    try:
+        with http_client.get(tgz_url, stream=True, timeout=30) as r:
+            if r.status_code != 200:
+                print(f"❌ OA package download failed for {pmcid}: HTTP {r.status_code}")
+                return None
+            with tarfile.open(fileobj=r.raw, mode="r|gz") as tar:
+                for member in tar:
+                    if member.isfile() and member.name.lower().endswith(".pdf"):
+                        with tar.extractfile(member) as pdf_file:
+                            return _save_stream(pdf_file, filename)
+    except (requests.exceptions.RequestException, tarfile.TarError, OSError) as e:
+        print(f"❌ OA package streaming failed for {pmcid}: {e}")
     return None
 
 def _stream_pmc_pdf(url, filename):
     if url.startswith("ftp://"):
         url = url.replace("ftp://", "https://", 1)
-    r = requests.get(url, stream=True, timeout=30)
-    if r.status_code == 200 and r.headers.get("content-type", "").startswith("application/pdf"):
-        return _save_stream(r.raw, filename)
+    try:
+        # `with` returns the pooled connection on every path, misses included
+        with http_client.get(url, stream=True, timeout=30) as r:
+            if r.status_code == 200 and \
+                    r.headers.get("content-type", "").startswith("application/pdf"):
+                return _save_stream(r.raw, filename)
+    except (requests.exceptions.RequestException, OSError) as e:
+        print(f"❌ PDF download failed for {url}: {e}")
     return None
 
 def _save_stream(stream, filename):
     os.makedirs(PDF_DIR, exist_ok=True)
     path = os.path.join(PDF_DIR, filename)
-    with open(path, "wb") as f:
-        shutil.copyfileobj(stream, f)
+    tmp_path = path + ".part"              # never leave a truncated PDF behind
+    try:
+        with open(tmp_path, "wb") as f:
+            shutil.copyfileobj(stream, f)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
     print(f"Downloaded PDF to → {path}")
     return path
 
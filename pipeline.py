@@ -0,0 +1,178 @@
+"""
+pipeline.py  ·  asyncio stage engine for SciCom.run_extraction
+---------------------------------------------------------------------------
+Each step of article processing runs as its own stage: a pool of
+coroutine workers reading from a bounded asyncio.Queue and writing to the
+next one.
+
+    source ─▶ prepare ─▶ download ─▶ extract ─▶ tag ─▶ persist
+
+Network and Mongo calls go through a thread bridge (asyncio.to_thread);
+the HTTP layer is the shared pooled/rate-limited/cached client, so there is
+no separate async HTTP stack to keep in sync.  CPU-heavy stages (PDF text,
+tagging) run out of process: PDFs in the pdf_sandbox workers, tagging on
+the cpu_pool process pool.  The tag stage takes whatever is queued (up to
+PIPELINE_TAG_BATCH_SIZE) and tags it with one tag_articles call, as
+SciCom's serial path does per batch, so suggest_tags_batch can fan out.  Per-stage concurrency comes from
+PIPELINE_CONCURRENCY, so downloads keep the network busy while PDFs are
+parsed and tagged.  The stage bodies are the same article_stages functions
+SciCom.process_pubmed_id uses, so documents, CSV rows and citations match.
+"""
+
+import asyncio
+import concurrent.futures
+
+from config import PIPELINE_CONCURRENCY, PIPELINE_QUEUE_SIZE, PIPELINE_TAG_BATCH_SIZE
+from cpu_pool import get_cpu_pool
+from article_stages import (
+    fetch_keyword,
+    refresh_article,
+    record_error,
+    prepare_article,
+    resolve_pdf,
+    extract_text_logged,
+    lookup_text,
+    store_text,
+    tag_articles,
+    persist_article,
+)
+
+_DONE = object()            # end-of-stream marker passed down the queues
+
+
+async def _run_stage(fn, inq, outq, workers):
+    """
+    Run `workers` coroutines applying `fn` to items from `inq`. Items for
+    which fn returns None are dropped; the rest go to `outq`. Closes `outq`
+    once every worker has seen the end marker.
+    """
+    async def worker():
+        while True:
+            item = await inq.get()
+            if item is _DONE:
+                await inq.put(_DONE)        # let sibling workers see it too
+                return
+            out = await fn(item)
+            if out is not None and outq is not None:
+                await outq.put(out)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    if outq is not None:
+        await outq.put(_DONE)
+
+
+async def _run_batch_stage(fn, inq, outq, workers, batch_size):
+    """
+    Like _run_stage, but `fn` takes a list: each worker waits for one item,
+    adds whatever else is already queued (up to `batch_size`) and passes
+    fn's returned items on to `outq`.
+    """
+    async def worker():
+        done = False
+        while not done:
+            batch = [await inq.get()]
+            while len(batch) < batch_size and not inq.empty():
+                batch.append(inq.get_nowait())
+            if _DONE in batch:
+                batch.remove(_DONE)
+                await inq.put(_DONE)        # let sibling workers see it too
+                done = True
+            if batch:
+                for out in await fn(batch):
+                    await outq.put(out)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    await outq.put(_DONE)
+
+
+async def run_pipeline(keywords, start_date, end_date, db, abbr_map, run_log_id,
+                       writer=None):
+    """
+    Process every hit for `keywords`; return the list of per-article results.
+    Mongo writes are queued on `writer` (a BulkWriter) when given.
+    """
+    loop = asyncio.get_running_loop()
+    io_threads = sum(PIPELINE_CONCURRENCY[s] for s in
+                     ("prepare", "download", "extract", "tag", "persist")) + 1
+    loop.set_default_executor(concurrent.futures.ThreadPoolExecutor(max_workers=io_threads))
+    cpu_executor = get_cpu_pool()
+
+    queues = [asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE) for _ in range(5)]
+    q_prepare, q_download, q_extract, q_tag, q_persist = queues
+    results = []
+
+    async def source():
+        for kw in keywords:
+            print(f"\n🔍  Keyword: {kw}")
+            if writer is not None:
+                await asyncio.to_thread(writer.flush)
+            known, batches = await asyncio.to_thread(
+                fetch_keyword, db, kw, start_date, end_date)
+            if batches is None:
+                print("   (no new articles)")
+                continue
+            for doc in known:
+                results.append(await asyncio.to_thread(refresh_article, db, doc, writer))
+            batches = iter(batches)
+            while (batch := await asyncio.to_thread(next, batches, None)) is not None:
+                for item in batch:
+                    await q_prepare.put(item)
+        await q_prepare.put(_DONE)
+
+    async def prepare(item):
+        details = item["details"]
+        if "error" in details:
+            pid = details["pubmed_id"]
+            await asyncio.to_thread(record_error, db, run_log_id, pid, details["error"])
+            results.append({"pubmed_id": pid, "skipped": True})
+            return None
+        item["existing"] = await asyncio.to_thread(
+            prepare_article, details, db, abbr_map, item["existing"])
+        return item
+
+    async def download(item):
+        item["pdf_file"] = await asyncio.to_thread(resolve_pdf, item["details"])
+        return item
+
+    async def extract(item):
+        item["text_key"], item["full_text"] = await asyncio.to_thread(
+            lookup_text, db, item["details"]["pubmed_id"], item["pdf_file"])
+        item["store_text"] = False
+        if item["full_text"] is None:
+            # sandboxed subprocess (or the cpu pool when PDF_SANDBOX is off)
+            full_text = await asyncio.to_thread(
+                extract_text_logged, db, run_log_id, item["details"]["pubmed_id"],
+                item["pdf_file"], True)
+            item["store_text"] = full_text is not None   # failed: retry next run
+            item["full_text"] = full_text or ""
+        return item
+
+    async def tag(batch):
+        # cache checks in a thread; uncached texts fanned out over the process pool
+        tags = await asyncio.to_thread(
+            tag_articles, [(it["details"], it["full_text"], it["existing"]) for it in batch],
+            cpu_executor)
+        for item, item_tags in zip(batch, tags):
+            item["tags"] = item_tags
+        return batch
+
+    async def persist(item):
+        details = item["details"]
+        if item["store_text"]:
+            await asyncio.to_thread(store_text, db, details["pubmed_id"],
+                                    item["full_text"], item["text_key"], writer)
+        await asyncio.to_thread(persist_article, db, details, item["existing"],
+                                item["pdf_file"], item["tags"], writer)
+        results.append(details)
+        return None
+
+    await asyncio.gather(
+        source(),
+        _run_stage(prepare,  q_prepare,  q_download, PIPELINE_CONCURRENCY["prepare"]),
+        _run_stage(download, q_download, q_extract,  PIPELINE_CONCURRENCY["download"]),
+        _run_stage(extract,  q_extract,  q_tag,      PIPELINE_CONCURRENCY["extract"]),
+        _run_batch_stage(tag, q_tag,     q_persist,  PIPELINE_CONCURRENCY["tag"],
+                         PIPELINE_TAG_BATCH_SIZE),
+        _run_stage(persist,  q_persist,  None,       PIPELINE_CONCURRENCY["persist"]),
+    )
+    return results
@@ -1,76 +1,95 @@
-from bs4 import BeautifulSoup
+import io
+import json
 import requests
-import time
-from datetime import datetime
-from dateutil import parser as date_parser
-from config import NCBI_API_KEY
+import response_cache
+from pubmed_xml import iter_pubmed_articles, parse_pub_date
+from config import (
+    NCBI_API_KEY,
+    EFETCH_BATCH_SIZE,
+    EFETCH_HISTORY_BATCH_SIZE,
+    ENTREZ_USE_HISTORY,
+    SEARCH_MAX_RESULTS,
+)
+from rate_limit import ncbi_limiter
+from oa_utils import resolve_oa
 
 # -------------------- PubMed Helpers --------------------
 
-def parse_pub_date(pub_date_tag):
-    if not pub_date_tag:
-        return "No Publication Date"
+ESEARCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+EFETCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
 
-    year = pub_date_tag.find("Year")
-    month = pub_date_tag.find("Month")
-    day = pub_date_tag.find("Day")
-
-    date_str_parts = []
-    if year:
-        date_str_parts.append(year.text)
-    if month:
-        date_str_parts.append(month.text)
-    if day:
-        date_str_parts.append(day.text)
-
-    date_str = " ".join(date_str_parts).strip()
-    if not date_str:
-        return "No Publication Date"
+ESEARCH_MAX_RETMAX = 10000      # esearch never returns IDs past the first 10,000
+UILIST_BATCH_SIZE = 5000         # PMIDs per efetch rettype=uilist window
 
+def search_pubmed_date_range(query, start_date, end_date, max_results=SEARCH_MAX_RESULTS):
+    """
+    Return up to `max_results` PMIDs for `query` from one esearch call.
+    Hits past the cap (or past esearch's 10,000 limit) are reported.
+    """
+    params = {
+        "db": "pubmed",
+        "term": query,
+        "retmode": "json",
+        "retmax": min(max_results, ESEARCH_MAX_RETMAX),
+        "datetype": "pdat",
+        "mindate": start_date.strftime("%Y/%m/%d"),
+        "maxdate": end_date.strftime("%Y/%m/%d"),
+        "api_key": NCBI_API_KEY
+    }
     try:
-        dt = date_parser.parse(date_str)
-        return dt.strftime("%Y-%m-%d")
-    except Exception:
-        return date_str
+        result = json.loads(response_cache.fetch(
+            "GET", ESEARCH_URL, "esearch", params=params, timeout=30,
+            limiter=ncbi_limiter))["esearchresult"]
+    except Exception as e:
+        print(f"Error searching PubMed for query '{query}': {e}")
+        return []
 
-def search_pubmed_date_range(query, start_date, end_date, max_results=1000):
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-    mindate = start_date.strftime("%Y/%m/%d")
-    maxdate = end_date.strftime("%Y/%m/%d")
+    ids = result.get("idlist", [])
+    _warn_capped(query, int(result.get("count", len(ids))), len(ids))
+    return ids
 
-    all_ids = []
-    retstart = 0
-    batch_size = 100
-    while True:
-        params = {
+def search_pubmed_ids(query, start_date, end_date, max_results=SEARCH_MAX_RESULTS):
+    """
+    Return up to `max_results` PMIDs for `query`.  With ENTREZ_USE_HISTORY
+    the search result stays on the Entrez history server and the IDs are
+    read from it in efetch rettype=uilist windows (no 10,000 limit);
+    otherwise one esearch call returns them.
+    """
+    if not ENTREZ_USE_HISTORY:
+        return search_pubmed_date_range(query, start_date, end_date, max_results)
+
+    handle = search_pubmed_history(query, start_date, end_date)
+    if not handle or not handle["count"]:
+        return []
+    limit = min(handle["count"], max_results)
+    _warn_capped(query, handle["count"], limit)
+    ids = []
+    for retstart in range(0, limit, UILIST_BATCH_SIZE):
+        data = {
             "db": "pubmed",
-            "term": query,
-            "retmode": "json",
-            "retmax": batch_size,
+            "query_key": handle["query_key"],
+            "WebEnv": handle["webenv"],
             "retstart": retstart,
-            "datetype": "pdat",
-            "mindate": mindate,
-            "maxdate": maxdate
+            "retmax": min(UILIST_BATCH_SIZE, limit - retstart),
+            "rettype": "uilist",
+            "retmode": "text",
+            "api_key": NCBI_API_KEY
         }
         try:
-            response = requests.get(base_url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-        except Exception as e:
-            print(f"Error searching PubMed for query '{query}': {e}")
-            break
-
-        id_list = data["esearchresult"].get("idlist", [])
-        all_ids.extend(id_list)
-
-        if len(id_list) < batch_size or len(all_ids) >= max_results:
+            body = response_cache.fetch("POST", EFETCH_URL, "efetch", data=data,
+                                        timeout=60, limiter=ncbi_limiter)
+        except requests.exceptions.RequestException as e:
+            print(f"Error listing PubMed IDs for '{query}' from {retstart}: {e}")
             break
-        retstart += batch_size
+        ids.extend(line.strip() for line in body.decode().splitlines() if line.strip())
+    return ids
 
-    return all_ids[:max_results]
+def _warn_capped(query, count, kept):
+    if count > kept:
+        print(f"⚠️ '{query}' matched {count} articles; only the first {kept} are processed "
+              f"(SEARCH_MAX_RESULTS={SEARCH_MAX_RESULTS})")
 
 def fetch_pubmed_details(pubmed_id):
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
     params = {
         "db": "pubmed",
         "id": pubmed_id,
@@ -78,116 +97,179 @@ def fetch_pubmed_details(pubmed_id):
         "api_key": NCBI_API_KEY
     }
 
-    for attempt in range(3):
-        try:
-            response = requests.get(base_url, params=params, timeout=10)
-            if response.status_code == 429:
-                print(f"[429] Rate limit hit for ID {pubmed_id}. Sleeping 60s… (Attempt {attempt+1})")
-                time.sleep(60)
-                continue
-            response.raise_for_status()
-            break
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching PubMed data for ID {pubmed_id}: {e}")
-            return {"pubmed_id": pubmed_id, "error": f"Request error: {e}"}
+    try:
+        body = response_cache.fetch("GET", EFETCH_URL, "efetch", params=params,
+                                    timeout=10, limiter=ncbi_limiter)
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching PubMed data for ID {pubmed_id}: {e}")
+        return {"pubmed_id": pubmed_id, "error": f"Request error: {e}"}
 
     try:
-        soup = BeautifulSoup(response.text, "xml")
+        articles = list(iter_pubmed_articles(io.BytesIO(body)))
     except Exception as e:
         print(f"XML parsing error for PubMed ID {pubmed_id}: {e}")
         return {"pubmed_id": pubmed_id, "error": f"XML parsing error: {e}"}
+    if not articles:
+        return {"pubmed_id": pubmed_id, "error": "Not returned by efetch"}
 
-    # Extract Title
-    title_tag = soup.find("ArticleTitle")
-    title = title_tag.text if title_tag else "No Title Found"
-
-    # Extract Abstract
-    abstract_tags = soup.find_all("AbstractText")
-    abstract = "\n".join(
-        f"{atag.get('Label') + ': ' if atag.get('Label') else ''}{atag.text}"
-        for atag in abstract_tags
-    ) if abstract_tags else "No Abstract Found"
-
-    # Extract Pub Date
-    date_tag = soup.find("PubDate")
-    publication_date = parse_pub_date(date_tag)
-
-    # Extract Keywords
-    keyword_tags = soup.find_all("Keyword")
-    keywords = [kw.text for kw in keyword_tags if kw.text]
-
-    # Extract Authors
-    authors_list = []
-    for author in soup.find_all("Author"):
-        firstname = author.find("ForeName")
-        lastname = author.find("LastName")
-        if firstname and lastname:
-            authors_list.append(f"{firstname.text} {lastname.text}")
-
-    # Extract Journal
-    journal_tag = soup.find("Title")
-    journal = journal_tag.text if journal_tag else "No Journal Found"
-
-    # Extract DOI
-    doi_tag = soup.find("ArticleId", {"IdType": "doi"})
-    doi = doi_tag.text.strip() if doi_tag else "No DOI Found"
-
-    # Fulltext Link
-    fulltext_link_tag = soup.find("ELocationID", {"EIdType": "doi", "ValidYN": "Y"})
-    fulltext_link = f"https://doi.org/{fulltext_link_tag.text.strip()}" if fulltext_link_tag else "No Full Text Link"
-
-    # ✅ Safe PMCID extraction with forced prefix
-    pmcid = "No PMC ID"
-    article_ids = soup.find_all("ArticleId")
-    for aid in article_ids:
-        if aid.get("IdType") == "pmc":
-            pmcid_raw = aid.text.strip()
-            pmcid = pmcid_raw if pmcid_raw.startswith("PMC") else f"PMC{pmcid_raw}"
-            break
+    article = articles[0]
+    if article["pubmed_id"] != pubmed_id:
+        print(f"⚠️ PMCID mismatch: PMCID {article['pmcid']} does not belong to PubMed ID {pubmed_id}")
+        article["pmcid"] = None
+    article["pubmed_id"] = pubmed_id
+    return _with_access(article)
 
-    # ✅ Final safety: verify PMCID belongs to the same PubMed ID
-    pubmed_id_tag = soup.find("ArticleId", {"IdType": "pubmed"})
-    if pubmed_id_tag and pubmed_id_tag.text.strip() != pubmed_id:
-        print(f"⚠️ PMCID mismatch: PMCID {pmcid} does not belong to PubMed ID {pubmed_id}")
-        pmcid = "No PMC ID"
+def fetch_pubmed_details_batch(pubmed_ids, batch_size=EFETCH_BATCH_SIZE):
+    """
+    Fetch details for many PubMed IDs with one efetch POST per `batch_size` IDs.
+    Returns {pubmed_id: paper_data} in input order; IDs that could not be
+    fetched or were missing from the response map to an error dict with the
+    same shape fetch_pubmed_details returns.
+    """
+    results = {}
+    ids = [str(pid) for pid in pubmed_ids]
+    for i in range(0, len(ids), batch_size):
+        chunk = ids[i:i+batch_size]
+        data = {
+            "db": "pubmed",
+            "id": ",".join(chunk),
+            "retmode": "xml",
+            "api_key": NCBI_API_KEY
+        }
 
-    # Determine Free vs Paid access
-    access = "Paid"
-    if pmcid.startswith("PMC"):
-        oa_url = f"https://www.ncbi.nlm.nih.gov/pmc/utils/oa/oa.fcgi?id={pmcid}"
-        try:
-            oa_response = requests.get(oa_url, timeout=10)
-            if oa_response.status_code == 200 and "<link" in oa_response.text:
-                access = "Free"
-        except Exception as e:
-            print(f"OA API check failed for {pmcid}: {e}")
-
-    # Extract volume/issue/pages
-    volume_tag = soup.find("Volume")
-    issue_tag = soup.find("Issue")
-    pages_tag = soup.find("MedlinePgn")
-    volume = volume_tag.text if volume_tag else ""
-    issue = issue_tag.text if issue_tag else ""
-    pages = pages_tag.text if pages_tag else ""
-
-    # ✅ Construct paper_data (after pmcid is finalized)
-    paper_data = {
-        "pubmed_id": pubmed_id,
-        "title": title,
-        "abstract": abstract,
-        "authors": authors_list,
-        "keywords": keywords,
-        "journal": journal,
-        "publication_date": publication_date,
-        "doi": doi,
-        "fulltext_link": fulltext_link,
-        "pmcid": pmcid if pmcid != "No PMC ID" else None,  # force None if invalid
-        "access": access,
-        "volume": volume,
-        "issue": issue,
-        "pages": pages
+        articles, error = _efetch_articles(data, f"batch starting at ID {chunk[0]}")
+        if error:
+            for pid in chunk:
+                results[pid] = {"pubmed_id": pid, "error": error}
+            continue
+
+        wanted = set(chunk)
+        parsed = {}
+        for article in articles:
+            pid = article["pubmed_id"]
+            if pid in wanted and pid not in parsed:
+                parsed[pid] = _with_access(article)
+
+        for pid in chunk:
+            results[pid] = parsed.get(pid) or {
+                "pubmed_id": pid,
+                "error": "Not returned by efetch"
+            }
+
+    return results
+
+def search_pubmed_history(query, start_date, end_date):
+    """
+    Run esearch with usehistory=y and return a history handle
+    {"webenv", "query_key", "count"} for iter_pubmed_history, or None on error.
+    No IDs are transferred; they stay on the Entrez history server.
+    """
+    params = {
+        "db": "pubmed",
+        "term": query,
+        "retmode": "json",
+        "retmax": 0,
+        "usehistory": "y",
+        "datetype": "pdat",
+        "mindate": start_date.strftime("%Y/%m/%d"),
+        "maxdate": end_date.strftime("%Y/%m/%d"),
+        "api_key": NCBI_API_KEY
+    }
+    try:
+        result = json.loads(response_cache.fetch(
+            "GET", ESEARCH_URL, "esearch", params=params, timeout=10,
+            limiter=ncbi_limiter))["esearchresult"]
+    except Exception as e:
+        print(f"Error searching PubMed for query '{query}': {e}")
+        return None
+
+    if "webenv" not in result or "querykey" not in result:
+        print(f"Error searching PubMed for query '{query}': no history handle returned")
+        return None
+
+    return {
+        "webenv": result["webenv"],
+        "query_key": result["querykey"],
+        "count": int(result.get("count", 0))
     }
 
-    return paper_data
+def iter_pubmed_history(handle, max_results=SEARCH_MAX_RESULTS,
+                        batch_size=EFETCH_HISTORY_BATCH_SIZE):
+    """
+    Stream paper_data dicts for a search_pubmed_history handle, one list per
+    efetch retstart/retmax window, stopping after `max_results` articles.
+    A window that fails yields a single error dict (pubmed_id None).
+    """
+    limit = min(handle["count"], max_results)
+    retstart = 0
+    while retstart < limit:
+        retmax = min(batch_size, limit - retstart)
+        data = {
+            "db": "pubmed",
+            "query_key": handle["query_key"],
+            "WebEnv": handle["webenv"],
+            "retstart": retstart,
+            "retmax": retmax,
+            "retmode": "xml",
+            "api_key": NCBI_API_KEY
+        }
+
+        label = f"history window {retstart}-{retstart + retmax}"
+        articles, error = _efetch_articles(data, label)
+        if error:
+            yield [{"pubmed_id": None, "error": f"{label}: {error}"}]
+        else:
+            yield [_with_access(article) for article in articles]
+        retstart += retmax
+
+def search_and_fetch(query, start_date, end_date):
+    """
+    Return an iterable of paper_data batches for `query`, or None when the
+    search found nothing. With ENTREZ_USE_HISTORY the IDs stay on the
+    Entrez history server and efetch streams large windows from it.
+    """
+    if ENTREZ_USE_HISTORY:
+        handle = search_pubmed_history(query, start_date, end_date)
+        if not handle or not handle["count"]:
+            return None
+        print(f"➡️  Found {handle['count']} articles")
+        _warn_capped(query, handle["count"], min(handle["count"], SEARCH_MAX_RESULTS))
+        return iter_pubmed_history(handle)
 
+    ids = search_pubmed_date_range(query, start_date, end_date)
+    if not ids:
+        return None
+    print(f"➡️  Found {len(ids)} articles")
+    return [list(fetch_pubmed_details_batch(ids).values())]
+
+def _efetch_articles(data, label):
+    """
+    POST one efetch request (through the response cache) and return
+    ([article dict, ...], None), or (None, error_message) if the request or
+    XML parsing failed.
+    """
+    try:
+        body = response_cache.fetch("POST", EFETCH_URL, "efetch", data=data,
+                                    timeout=60, limiter=ncbi_limiter)
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching PubMed {label}: {e}")
+        return None, f"Request error: {e}"
+
+    try:
+        articles = list(iter_pubmed_articles(io.BytesIO(body)))
+    except Exception as e:
+        print(f"XML parsing error for PubMed {label}: {e}")
+        return None, f"XML parsing error: {e}"
+    return articles, None
 
+def _with_access(article):
+    """
+    Add the Free/Paid "access" field to a parsed article dict.  It is left
+    out when the OA lookup could not run (offline cache miss), so a stored
+    value is not overwritten with a guess.
+    """
+    pmcid = article["pmcid"]
+    access = resolve_oa(pmcid)["access"] if pmcid else "Paid"
+    if access is not None:
+        article["access"] = access
+    return article
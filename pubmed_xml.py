@@ -0,0 +1,156 @@
+from lxml import etree
+from dateutil import parser as date_parser
+
+# -------------------- Streaming PubMed XML parser --------------------
+#
+# iterparse walks the efetch response once and hands back one dict per
+# <PubmedArticle>, clearing each element afterwards so a 500-article batch
+# never sits in memory as a full tree.  Field semantics follow the original
+# BeautifulSoup parser: "first match in document order" lookups, bs4-style
+# .text (all descendant text) and the same placeholder strings.
+
+def parse_pub_date(pub_date_tag):
+    if pub_date_tag is None:
+        return "No Publication Date"
+
+    year = pub_date_tag.find("Year")
+    month = pub_date_tag.find("Month")
+    day = pub_date_tag.find("Day")
+
+    date_str_parts = []
+    if year is not None:
+        date_str_parts.append(year.text)
+    if month is not None:
+        date_str_parts.append(month.text)
+    if day is not None:
+        date_str_parts.append(day.text)
+
+    date_str = " ".join(p for p in date_str_parts if p).strip()
+    if not date_str:
+        return "No Publication Date"
+
+    try:
+        dt = date_parser.parse(date_str)
+        return dt.strftime("%Y-%m-%d")
+    except Exception:
+        return date_str
+
+def iter_pubmed_articles(source):
+    """
+    Yield one article dict per <PubmedArticle> in `source` (a path or a
+    binary file-like object such as a streamed response body).
+
+    The dicts carry every paper_data field except "access", which needs the
+    OA service and is filled in by pubmed_utils.
+    """
+    context = etree.iterparse(
+        source,
+        events=("end",),
+        tag="PubmedArticle",
+        resolve_entities=False,
+        no_network=True,
+        huge_tree=True,
+    )
+    for _, elem in context:
+        try:
+            yield parse_article_element(elem)
+        finally:
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+    del context
+
+def parse_article_element(article):
+    """
+    Build the article dict from one <PubmedArticle> element.
+    """
+    pmid_tag = _first(article, "PMID")
+    pubmed_id = _text(pmid_tag).strip() if pmid_tag is not None else ""
+
+    # Extract Title
+    title_tag = _first(article, "ArticleTitle")
+    title = _text(title_tag) if title_tag is not None else "No Title Found"
+
+    # Extract Abstract
+    abstract_tags = list(article.iter("AbstractText"))
+    abstract = "\n".join(
+        f"{atag.get('Label') + ': ' if atag.get('Label') else ''}{_text(atag)}"
+        for atag in abstract_tags
+    ) if abstract_tags else "No Abstract Found"
+
+    # Extract Pub Date
+    publication_date = parse_pub_date(_first(article, "PubDate"))
+
+    # Extract Keywords
+    keywords = [t for t in (_text(kw) for kw in article.iter("Keyword")) if t]
+
+    # Extract Authors
+    authors_list = []
+    for author in article.iter("Author"):
+        firstname = _first(author, "ForeName")
+        lastname = _first(author, "LastName")
+        if firstname is not None and lastname is not None:
+            authors_list.append(f"{_text(firstname)} {_text(lastname)}")
+
+    # Extract Journal
+    journal_tag = _first(article, "Title")
+    journal = _text(journal_tag) if journal_tag is not None else "No Journal Found"
+
+    # Extract DOI / PMCID / PubMed ArticleIds in one pass
+    doi_tag = pmc_tag = pubmed_id_tag = None
+    for aid in article.iter("ArticleId"):
+        id_type = aid.get("IdType")
+        if id_type == "doi" and doi_tag is None:
+            doi_tag = aid
+        elif id_type == "pmc" and pmc_tag is None:
+            pmc_tag = aid
+        elif id_type == "pubmed" and pubmed_id_tag is None:
+            pubmed_id_tag = aid
+    doi = _text(doi_tag).strip() if doi_tag is not None else "No DOI Found"
+
+    # Fulltext Link
+    fulltext_link = "No Full Text Link"
+    for loc in article.iter("ELocationID"):
+        if loc.get("EIdType") == "doi" and loc.get("ValidYN") == "Y":
+            fulltext_link = f"https://doi.org/{_text(loc).strip()}"
+            break
+
+    # ✅ Safe PMCID extraction with forced prefix
+    pmcid = None
+    if pmc_tag is not None:
+        pmcid_raw = _text(pmc_tag).strip()
+        pmcid = pmcid_raw if pmcid_raw.startswith("PMC") else f"PMC{pmcid_raw}"
+
+    # ✅ Final safety: verify PMCID belongs to the same PubMed ID
+    if pubmed_id_tag is not None and _text(pubmed_id_tag).strip() != pubmed_id:
+        print(f"⚠️ PMCID mismatch: PMCID {pmcid} does not belong to PubMed ID {pubmed_id}")
+        pmcid = None
+
+    # Extract volume/issue/pages
+    volume_tag = _first(article, "Volume")
+    issue_tag = _first(article, "Issue")
+    pages_tag = _first(article, "MedlinePgn")
+
+    return {
+        "pubmed_id": pubmed_id,
+        "title": title,
+        "abstract": abstract,
+        "authors": authors_list,
+        "keywords": keywords,
+        "journal": journal,
+        "publication_date": publication_date,
+        "doi": doi,
+        "fulltext_link": fulltext_link,
+        "pmcid": pmcid,
+        "volume": _text(volume_tag) if volume_tag is not None else "",
+        "issue": _text(issue_tag) if issue_tag is not None else "",
+        "pages": _text(pages_tag) if pages_tag is not None else "",
+    }
+
+def _first(elem, tag):
+    """First descendant named `tag` in document order (bs4's find())."""
+    return next(elem.iter(tag), None)
+
+def _text(elem):
+    """All descendant text, like bs4's .text."""
+    return "".join(elem.itertext())
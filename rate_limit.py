@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import time
+from config import NCBI_RATE_LIMIT
+
+# -------------------- Token-bucket rate limiter --------------------
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `rate` tokens are added per second up to
+    `capacity`; acquire() blocks (acquire_async() awaits) until a token is
+    available. Each caller reserves its slot under the lock and sleeps
+    outside it, so waiting threads and coroutines queue up in arrival order.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens):
+        """Take `tokens` (possibly going into debt); return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens=1):
+        wait = self._reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens=1):
+        wait = self._reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+# NCBI allows 3 requests/s without an API key and 10 requests/s with one.
+# Every E-utilities / PMC OA call in the process goes through this bucket.
+ncbi_limiter = TokenBucket(NCBI_RATE_LIMIT)
@@ -0,0 +1,195 @@
+"""
+recompute_titles.py  ·  Re-apply abbreviations.csv to existing updated_titles
+---------------------------------------------------------------------------
+Articles keep the updated_title computed when they were first scraped.
+After editing input data/abbreviations.csv, run this job: it diffs the CSV
+against the map it last applied (stored in abbreviation_state), looks up
+only the articles whose title contains an added, changed or removed term
+through the articles.title_words multikey index, recomputes those with
+compute_updated_title and writes the changes with bulk_write.  Work is
+proportional to the change, not to the collection.
+
+With --rename-pdfs the matching PDFs (in PDF_DIR or its approved/ and
+rejected/ folders) are renamed to the new title and articles.pdf_file
+follows; a file is renamed back when its document update fails, so PDFs
+and pdf_file never disagree.  The first run (no stored map) recomputes
+every title that contains any term, and backfills title_words for older
+articles.
+
+    python recompute_titles.py [--rename-pdfs] [--batch-size 500] [--dry-run]
+"""
+
+import argparse
+import os
+from datetime import datetime
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from db_utils import connect_to_mongo
+from db_migrations import apply_migrations
+from abbrev_utils import compute_updated_title, title_words, term_words
+from utils import load_abbreviation_map, pdf_filename, locate_pdf
+
+STATE_ID = "applied"
+FIELDS = {"pubmed_id": 1, "title": 1, "authors": 1, "publication_date": 1,
+          "updated_title": 1, "pdf_file": 1}
+
+
+def load_applied_map(db):
+    """The abbreviation map last applied, or None before the first run."""
+    doc = db["abbreviation_state"].find_one({"_id": STATE_ID})
+    return dict(doc["pairs"]) if doc else None
+
+
+def save_applied_map(db, abbr_map):
+    # stored as pairs: terms may contain "." which Mongo keys cannot
+    db["abbreviation_state"].update_one(
+        {"_id": STATE_ID},
+        {"$set": {"pairs": [[t, a] for t, a in abbr_map.items()],
+                  "applied_at": datetime.now()}},
+        upsert=True
+    )
+
+
+def diff_maps(old, new):
+    """Lower-cased terms added, removed or given a new abbreviation."""
+    old = {t.lower(): a for t, a in (old or {}).items()}
+    new = {t.lower(): a for t, a in new.items()}
+    return {t for t in old.keys() | new.keys() if old.get(t) != new.get(t)}
+
+
+def backfill_title_words(db, batch_size=500):
+    """Set title_words on articles scraped before the field existed."""
+    ops, done = [], 0
+    for doc in db["articles"].find({"title_words": {"$exists": False}}, {"title": 1}):
+        ops.append(UpdateOne({"_id": doc["_id"]},
+                             {"$set": {"title_words": title_words(doc.get("title", ""))}}))
+        if len(ops) >= batch_size:
+            done += db["articles"].bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        done += db["articles"].bulk_write(ops, ordered=False).modified_count
+    return done
+
+
+def affected_articles(db, terms):
+    """Articles whose title holds every word of at least one term (deduplicated)."""
+    seen = {}
+    for term in terms:
+        words = term_words(term)
+        if not words:
+            continue
+        for doc in db["articles"].find({"title_words": {"$all": words}}, FIELDS):
+            seen.setdefault(doc["_id"], doc)
+    return list(seen.values())
+
+
+def rename_pdf(doc, new_title):
+    """
+    Rename the article's PDF after new_title; return (new pdf_file, old
+    path, new path), or None when there is nothing to rename.
+    """
+    old_path = locate_pdf(doc.get("pdf_file"))
+    if not old_path:
+        return None
+    new_path = os.path.join(os.path.dirname(old_path), pdf_filename(new_title))
+    if new_path == old_path:
+        return None
+    if os.path.exists(new_path):
+        print(f"⚠️ Not renaming {old_path}: {new_path} already exists")
+        return None
+    os.rename(old_path, new_path)
+    return (os.path.join(os.path.dirname(doc["pdf_file"]), os.path.basename(new_path)),
+            old_path, new_path)
+
+
+def _undo_renames(renames, indexes):
+    for i in indexes:
+        if i in renames:
+            old_path, new_path = renames[i]
+            os.rename(new_path, old_path)
+            print(f"↩️  Renamed {new_path} back to {old_path}")
+
+
+def write_batch(db, ops, renames):
+    """
+    bulk_write `ops`; `renames` maps an op index to the (old, new) path of
+    the PDF renamed for it.  PDFs of ops that did not apply are renamed back
+    before the error is re-raised (all of them if the write failed outright).
+    """
+    try:
+        db["articles"].bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        _undo_renames(renames, {err["index"] for err in e.details.get("writeErrors", [])})
+        raise
+    except PyMongoError:
+        _undo_renames(renames, list(renames))
+        raise
+
+
+def recompute(db, abbr_map, rename_pdfs=False, batch_size=500, dry_run=False):
+    """Apply `abbr_map` to the affected articles; returns (candidates, changed)."""
+    applied = load_applied_map(db)
+    terms = diff_maps(applied, abbr_map)
+    if applied is None:
+        filled = backfill_title_words(db, batch_size) if not dry_run else 0
+        print(f"ⓘ  No applied map on record: checking every term ({filled} title_words backfilled)")
+    if not terms:
+        print("✅ abbreviations unchanged since the last run")
+        return 0, 0
+
+    docs = affected_articles(db, terms)
+    print(f"🔍 {len(terms)} changed terms → {len(docs)} candidate articles")
+
+    ops, renames, changed = [], {}, 0
+    for doc in docs:
+        new_title = compute_updated_title(doc, abbr_map)
+        if new_title == doc.get("updated_title"):
+            continue
+        changed += 1
+        print(f"   {doc['pubmed_id']}: {doc.get('updated_title')} → {new_title}")
+        if dry_run:
+            continue
+        update = {"updated_title": new_title}
+        if rename_pdfs:
+            renamed = rename_pdf(doc, new_title)
+            if renamed:
+                update["pdf_file"], old_path, new_path = renamed
+                renames[len(ops)] = (old_path, new_path)
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+        if len(ops) >= batch_size:
+            write_batch(db, ops, renames)
+            ops, renames = [], {}
+    if ops:
+        write_batch(db, ops, renames)
+
+    if not dry_run:
+        save_applied_map(db, abbr_map)
+    return len(docs), changed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--rename-pdfs", action="store_true",
+                    help="rename matching PDFs to the new updated_title")
+    ap.add_argument("--batch-size", type=int, default=500)
+    ap.add_argument("--dry-run", action="store_true",
+                    help="print the changes without writing anything")
+    args = ap.parse_args()
+
+    abbr_map = load_abbreviation_map()
+    if not abbr_map:
+        print("❌ No abbreviations loaded; nothing applied.")
+        return
+    db = connect_to_mongo()
+    if not args.dry_run:
+        apply_migrations(db)             # title_words index (migration 5)
+    candidates, changed = recompute(db, abbr_map, args.rename_pdfs,
+                                    args.batch_size, args.dry_run)
+    print(f"\n✅ {changed} of {candidates} candidate titles "
+          f"{'would change' if args.dry_run else 'updated'}")
+
+
+if __name__ == "__main__":
+    main()
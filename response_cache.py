@@ -0,0 +1,138 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import requests
+import http_client
+from config import (
+    CACHE_DIR,
+    CACHE_ENABLED,
+    CACHE_OFFLINE,
+    CACHE_MAX_BYTES,
+    CACHE_TTL,
+)
+
+# -------------------- On-disk response cache --------------------
+#
+# Raw E-utilities / OA bodies are stored gzip-compressed under
+# CACHE_DIR/<2 hex>/<sha256>.gz, keyed by endpoint + request parameters
+# (the api_key is not part of the key).  File mtime is the write time and
+# drives the per-endpoint TTL; atime is bumped on every hit and drives LRU
+# eviction once the cache grows past CACHE_MAX_BYTES.  In offline mode
+# entries never expire and a miss raises CacheMiss instead of hitting NCBI.
+
+_IGNORED_PARAMS = {"api_key"}
+
+class CacheMiss(requests.exceptions.RequestException):
+    """Raised in offline mode when a response is not in the cache."""
+
+_lock = threading.Lock()
+_total_bytes = None
+
+def cache_key(endpoint, params=None):
+    items = sorted(
+        (str(k), str(v)) for k, v in (params or {}).items()
+        if k not in _IGNORED_PARAMS
+    )
+    raw = json.dumps([endpoint, items], separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _path(key):
+    return os.path.join(CACHE_DIR, key[:2], key[2:] + ".gz")
+
+def _read(path, ttl):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    now = time.time()
+    if not CACHE_OFFLINE and ttl is not None and now - st.st_mtime > ttl:
+        return None
+    try:
+        with gzip.open(path, "rb") as f:
+            body = f.read()
+    except (OSError, EOFError):
+        return None
+    try:
+        os.utime(path, (now, st.st_mtime))   # LRU touch, keep write time
+    except OSError:
+        pass                                 # evicted meanwhile; the body is still good
+    return body
+
+def _write(path, body):
+    global _total_bytes
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with gzip.open(tmp, "wb", compresslevel=6) as f:
+        f.write(body)
+    size = os.path.getsize(tmp)
+    os.replace(tmp, path)
+    with _lock:
+        if _total_bytes is None:
+            _total_bytes = _scan_size()
+        else:
+            _total_bytes += size
+        if _total_bytes > CACHE_MAX_BYTES:
+            _evict()
+
+def _entries():
+    for root, _, files in os.walk(CACHE_DIR):
+        for name in files:
+            if name.endswith(".gz"):
+                path = os.path.join(root, name)
+                try:
+                    yield path, os.stat(path)
+                except FileNotFoundError:
+                    continue
+
+def _scan_size():
+    return sum(st.st_size for _, st in _entries())
+
+def _evict():
+    """Drop least-recently-used entries until the cache is at 90% of its cap."""
+    global _total_bytes
+    entries = sorted(_entries(), key=lambda e: e[1].st_atime)
+    total = sum(st.st_size for _, st in entries)
+    target = CACHE_MAX_BYTES * 0.9
+    for path, st in entries:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+            total -= st.st_size
+        except FileNotFoundError:
+            pass
+    _total_bytes = total
+
+def fetch(method, url, endpoint, params=None, data=None, limiter=None, **kwargs):
+    """
+    Return the response body (bytes) for a GET/POST, reading through the
+    cache. `endpoint` ("esearch", "efetch", "oa") selects the TTL; `params`
+    and `data` are both part of the key. Non-2xx responses raise
+    requests.HTTPError and are never cached.
+    """
+    if not CACHE_ENABLED:
+        response = http_client.request(method, url, params=params, data=data,
+                                       limiter=limiter, **kwargs)
+        response.raise_for_status()
+        return response.content
+
+    key = cache_key(endpoint, {"url": url, **(params or {}), **(data or {})})
+    path = _path(key)
+    body = _read(path, CACHE_TTL.get(endpoint))
+    if body is not None:
+        return body
+    if CACHE_OFFLINE:
+        raise CacheMiss(f"Offline mode: no cached {endpoint} response for {url}")
+
+    response = http_client.request(method, url, params=params, data=data,
+                                   limiter=limiter, **kwargs)
+    response.raise_for_status()
+    body = response.content
+    try:
+        _write(path, body)
+    except OSError as e:
+        print(f"⚠️ Could not write cache entry {path}: {e}")
+    return body
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import Counter
+
+from config import NAV_COUNTS_TTL
+
+# -------------------- Review-page counts --------------------
+#
+# The index page shows five nav-pill counts plus the total for its own
+# filter.  Every one of them is a function of (status, access), so a single
+# aggregation grouping articles by that pair gives all of them at once; a
+# second $facet branch does the same for the articles carrying the selected
+# approved tag.  NavCounts keeps those buckets for NAV_COUNTS_TTL seconds and
+# the review POSTs move a document between buckets in place (moved(),
+# tag_added()), so most page loads never touch the collection for counts.
+# Articles inserted by the scraper (another process) appear once the TTL
+# expires.
+
+MISSING = "$missing"        # bucket key for articles without a status field
+COUNT_FIELDS = {"status": 1, "access": 1, "approved_tags": 1}
+
+
+def _bucket(doc):
+    return doc.get("status", MISSING), doc.get("access")
+
+
+def _group():
+    return {"$group": {"_id": {"status": "$status", "access": "$access"}, "n": {"$sum": 1}}}
+
+
+def count_buckets(coll, tag=None):
+    """({(status, access): n} for all articles, same for `tag` or None) in one round trip."""
+    facets = {"all": [_group()]}
+    if tag:
+        facets["tagged"] = [{"$match": {"approved_tags": tag}}, _group()]
+    result = next(iter(coll.aggregate([{"$facet": facets}])), {})
+
+    def buckets(rows):
+        return Counter({_bucket(row["_id"]): row["n"] for row in rows})
+
+    return buckets(result.get("all", [])), \
+        buckets(result.get("tagged", [])) if tag else None
+
+
+def category_counts(buckets):
+    """The index page's filter counts (same queries as app.index) from (status, access) buckets."""
+    counts = Counter(all=0)
+    for (status, access), n in buckets.items():
+        counts["all"] += n
+        if status in (MISSING, "Pending"):
+            counts["pending"] += n
+        if status == "Pending" and access in ("Free", "Paid"):
+            counts[access.lower()] += n
+        if status in ("approved", "rejected"):
+            counts[status] += n
+    return {k: counts[k] for k in ("pending", "free", "paid", "approved", "rejected", "all")}
+
+
+def _pills(base, tagged, tag):
+    pills = category_counts(base)
+    return pills, category_counts(tagged) if tag else pills
+
+
+class NavCounts:
+    """TTL cache of count_buckets() per tag filter, adjusted in place by review actions."""
+
+    def __init__(self, ttl=NAV_COUNTS_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._all = None            # (expires, buckets)
+        self._tagged = {}           # tag -> (expires, buckets)
+
+    def get(self, coll, tag=None):
+        """Return (nav-pill counts, counts for the tag filter or the same counts)."""
+        now = time.monotonic()
+        with self._lock:
+            base = self._all[1] if self._all and self._all[0] > now else None
+            tagged = self._tagged.get(tag) if tag else None
+            tagged = tagged[1] if tagged and tagged[0] > now else None
+            if base is not None and (tagged is not None or not tag):
+                return _pills(base, tagged, tag)
+        base, tagged = count_buckets(coll, tag)
+        with self._lock:
+            # once cached, moved()/tag_added() change the buckets in place:
+            # read them under the lock
+            if self.ttl > 0:
+                self._all = (now + self.ttl, base)
+                if tag:
+                    self._tagged = {t: e for t, e in self._tagged.items() if e[0] > now}
+                    self._tagged[tag] = (now + self.ttl, tagged)
+            return _pills(base, tagged, tag)
+
+    def moved(self, before, status):
+        """`before` (COUNT_FIELDS of the doc before the update) now has `status` (None = unset)."""
+        if not before:
+            return
+        old = _bucket(before)
+        new = (status or MISSING, before.get("access"))
+        if old == new:
+            return
+        with self._lock:
+            entries = [self._all] + [entry for tag, entry in self._tagged.items()
+                                     if tag in (before.get("approved_tags") or [])]
+            for entry in entries:
+                if entry:
+                    buckets = entry[1]
+                    buckets[old] -= 1
+                    buckets[new] += 1
+
+    def tag_added(self, before, tag):
+        """`tag` was $addToSet onto the doc whose previous COUNT_FIELDS are `before`."""
+        if not before or tag in (before.get("approved_tags") or []):
+            return
+        with self._lock:
+            entry = self._tagged.get(tag)
+            if entry:
+                entry[1][_bucket(before)] += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._all = None
+            self._tagged.clear()
@@ -1,6 +1,8 @@
-from pymongo import MongoClient
-from config import MONGO_URI
+from mongo_client import get_db
+from db_migrations import apply_migrations
 
-db = MongoClient(MONGO_URI)["research_papers"]
-db["article_text"].create_index("pubmed_id", unique=True)
-print("Unique index on article_text.pubmed_id created.")
+# Indexes are versioned in db_migrations.py and applied by init_db();
+# this script just applies any that are pending.
+db = get_db()
+applied = apply_migrations(db)
+print(f"Applied migrations: {applied or 'none pending'}")
@@ -1,5 +1,14 @@
+import hashlib
+import itertools
+import re
+import threading
+from collections import OrderedDict
+
 import yake
 
+from config import (TAG_ENGINE, TAG_MAX_FULLTEXT_TOKENS, TAG_CACHE_SIZE, TAG_BATCH_PARALLEL_MIN,
+                    CPU_WORKERS)
+
 # Configure once; tweak top_k or language as needed
 _LANG = "en"
 _MAX_NGRAM = 3
@@ -7,23 +16,166 @@ _DEDUPE_THRESHOLD = 0.9
 _DEDUPE_ALGO = "seqm"
 _WINDOW_SIZE = 1
 
-_extractor = yake.KeywordExtractor(
-    lan=_LANG,
-    n=_MAX_NGRAM,
-    dedupLim=_DEDUPE_THRESHOLD,
-    dedupFunc=_DEDUPE_ALGO,
-    windowsSize=_WINDOW_SIZE,
-    top=20         # always pull up to 20; we'll trim later
-)
+# part of every cache key, so changing a setting above invalidates old tags
+_PARAMS = f"{TAG_ENGINE}|{_LANG}|{_MAX_NGRAM}|{_DEDUPE_THRESHOLD}|{_DEDUPE_ALGO}|{_WINDOW_SIZE}"
+
+_extractor = None
+
+def get_extractor():
+    """Build the YAKE extractor on first use (once per process)."""
+    global _extractor
+    if _extractor is None:
+        _extractor = yake.KeywordExtractor(
+            lan=_LANG,
+            n=_MAX_NGRAM,
+            dedupLim=_DEDUPE_THRESHOLD,
+            dedupFunc=_DEDUPE_ALGO,
+            windowsSize=_WINDOW_SIZE,
+            top=20         # always pull up to 20; we'll trim later
+        )
+    return _extractor
+
+# -------------------- Bounded input --------------------
+#
+# YAKE's cost grows faster than linearly with text length, and past the
+# first couple of thousand words extra full text barely moves the top tags.
+# Title and abstract always go in whole; full text is cut after
+# TAG_MAX_FULLTEXT_TOKENS whitespace-separated tokens (keeping the original
+# line breaks, which YAKE uses for sentence splitting).
+
+_TOKEN = re.compile(r"\S+")
+
+def build_tag_source(title, abstract, full_text, max_tokens=None):
+    max_tokens = TAG_MAX_FULLTEXT_TOKENS if max_tokens is None else max_tokens
+    full_text = full_text or ""
+    if max_tokens and full_text:
+        last = None
+        for last in itertools.islice(_TOKEN.finditer(full_text), max_tokens):
+            pass
+        full_text = full_text[:last.end()] if last else ""
+    return " ".join([title or "", abstract or "", full_text])
+
+# -------------------- Memoized tagging --------------------
+
+def _params():
+    """_PARAMS plus the TF-IDF model version (documents counted), when selected."""
+    if TAG_ENGINE == "tfidf":
+        import tfidf_tags
+        return f"{_PARAMS}|{tfidf_tags.get_model().n_docs}"
+    return _PARAMS
+
+def tag_key(text, top_k=10):
+    """Hash of the tagger settings (and TF-IDF model version), top_k and input text."""
+    h = hashlib.sha256(f"{_params()}|{top_k}|".encode())
+    h.update(text.encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
 
 def suggest_tags(text: str, top_k: int = 10) -> list[str]:
     """
-    Return a list of up to `top_k` keyword strings suggested by YAKE,
-    sorted by importance (highest first).
+    Return a list of up to `top_k` keyword strings suggested by YAKE (or
+    the TF-IDF engine with TAG_ENGINE=tfidf), sorted by importance (highest
+    first).  Results are memoized per process in an LRU of TAG_CACHE_SIZE
+    entries keyed by tag_key().
+    """
+    return suggest_tags_batch([text], top_k)[0]
+
+def suggest_tags_batch(texts, top_k=10, executor=None, workers=None):
     """
-    if not text:
-        return []
-    keywords = _extractor.extract_keywords(text)
-    # keywords is a list of (phrase, score); lower score = more relevant
-    top_kw = sorted(keywords, key=lambda x: x[1])[:top_k]
-    return [phrase for phrase, score in top_kw]
+    suggest_tags for a list of documents in one call.  Cached documents are
+    answered from the LRU; the rest are tagged together (one sparse-matrix
+    pass for TF-IDF).  With an `executor` of `workers` processes (default
+    CPU_WORKERS, the cpu_pool size) and at least TAG_BATCH_PARALLEL_MIN
+    uncached documents, they are split into one chunk per worker.
+    `executor` may also be a factory such as cpu_pool.get_cpu_pool, called
+    only when the batch actually fans out.
+    """
+    keys = [tag_key(text, top_k) if text else None for text in texts]
+    out = [[] for _ in texts]
+    missing = []
+    with _cache_lock:
+        for i, key in enumerate(keys):
+            if key is None:
+                continue
+            if key in _cache:
+                _cache.move_to_end(key)
+                out[i] = list(_cache[key])
+            else:
+                missing.append(i)
+    if not missing:
+        return out
+
+    docs = [texts[i] for i in missing]
+    workers = CPU_WORKERS if workers is None else workers
+    if executor is not None and workers > 1 and len(docs) >= TAG_BATCH_PARALLEL_MIN:
+        if callable(executor):
+            executor = executor()
+        size = -(-len(docs) // workers)
+        chunks = [docs[i:i + size] for i in range(0, len(docs), size)]
+        results = [tags for chunk in executor.map(_tag_docs, chunks, [top_k] * len(chunks))
+                   for tags in chunk]
+    else:
+        results = _tag_docs(docs, top_k)
+
+    with _cache_lock:
+        for i, tags in zip(missing, results):
+            out[i] = list(tags)
+            _cache[keys[i]] = tags
+        while len(_cache) > TAG_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return out
+
+def _tag_docs(docs, top_k):
+    """Tag non-empty, uncached documents with the configured engine."""
+    if TAG_ENGINE == "tfidf":
+        import tfidf_tags
+        return tfidf_tags.get_model().suggest_tags(docs, top_k)
+    extractor = get_extractor()
+    out = []
+    for text in docs:
+        keywords = extractor.extract_keywords(text)
+        # keywords is a list of (phrase, score); lower score = more relevant
+        top_kw = sorted(keywords, key=lambda x: x[1])[:top_k]
+        out.append([phrase for phrase, score in top_kw])
+    return out
+
+def clear_tag_cache():
+    with _cache_lock:
+        _cache.clear()
+
+# -------------------- Timings --------------------
+
+class TagTimings:
+    """Thread-safe counters for the tagging step of one run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.articles = 0
+            self.cached = 0
+            self.seconds = 0.0
+            self.input_chars = 0
+
+    def add(self, seconds, chars, cached):
+        with self._lock:
+            self.articles += 1
+            self.cached += bool(cached)
+            self.seconds += seconds
+            self.input_chars += chars
+
+    def summary(self):
+        with self._lock:
+            return {
+                "articles": self.articles,
+                "cached": self.cached,
+                "seconds": round(self.seconds, 2),
+                "avg_ms": round(1000 * self.seconds / self.articles, 1) if self.articles else 0.0,
+                "avg_input_chars": self.input_chars // self.articles if self.articles else 0,
+            }
+
+tag_timings = TagTimings()
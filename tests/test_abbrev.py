@@ -5,3 +5,12 @@ def test_abbrev_replacement():
     text = "Outcomes after Transcatheter Aortic Valve Replacement procedures"
     result = replace_with_abbreviations(text, abbr_map)
     assert "TAVR" in result and "Transcatheter" not in result
+
+def test_matcher_prefers_longest_term_and_keeps_word_boundaries():
+    abbr_map = {
+        "aortic valve": "AV",
+        "transcatheter aortic valve implantation": "TAVI",
+        "valve": "V",
+    }
+    text = "Transcatheter aortic valve implantation vs aortic valves and one valve"
+    assert replace_with_abbreviations(text, abbr_map) == "TAVI vs aortic valves and one V"
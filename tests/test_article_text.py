@@ -13,4 +13,62 @@ def test_article_text_upsert():
     )
 
     doc = db["article_text"].find_one({"pubmed_id": sample_pid})
-    assert doc and doc["full_text"] == "hello"
\ No newline at end of file
+    assert doc and doc["full_text"] == "hello"
+
+# ---- text_key: skip re-extraction while the PDF, engine and page limit match ----
+
+import pymupdf
+import SciCom
+import pdf_text_utils
+
+
+class FakeTextColl:
+    def __init__(self):
+        self.docs, self.upserts = {}, 0
+
+    def find_one(self, query, projection=None):
+        doc = self.docs.get(query["pubmed_id"])
+        if doc and all(doc.get(k) == v for k, v in query.items()):
+            return doc
+        return None
+
+    def update_one(self, query, update, upsert=False):
+        self.upserts += 1
+        self.docs.setdefault(query["pubmed_id"], dict(query)).update(update["$set"])
+
+
+def _write_pdf(path, text):
+    doc = pymupdf.open()
+    doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+
+
+def test_matching_text_key_skips_extraction_and_upsert(tmp_path, monkeypatch):
+    pdf = tmp_path / "paper.pdf"
+    _write_pdf(pdf, "aortic stenosis")
+    db = {"article_text": FakeTextColl()}
+    extracted = []
+    monkeypatch.setattr(SciCom, "prepare_article", lambda details, db, abbr, **kw: None)
+    monkeypatch.setattr(SciCom, "resolve_pdf", lambda details: str(pdf))
+    monkeypatch.setattr(SciCom, "extract_text_logged",
+                        lambda db, run_log_id, pid, pdf_file, offload:
+                            extracted.append(pdf_file) or f"text {len(extracted)}")
+
+    def prepare():
+        return SciCom._prepare_pubmed_id("1", db, {}, None, {"pubmed_id": "1"})
+
+    assert prepare()["full_text"] == "text 1"
+    assert (len(extracted), db["article_text"].upserts) == (1, 1)
+    assert prepare()["full_text"] == "text 1"                # same key: served from Mongo
+    assert (len(extracted), db["article_text"].upserts) == (1, 1)
+
+    _write_pdf(pdf, "mitral regurgitation")                  # new PDF bytes
+    assert prepare()["full_text"] == "text 2"
+    monkeypatch.setattr(pdf_text_utils, "PDF_TEXT_ENGINE", "pypdf2")   # engine switch
+    assert prepare()["full_text"] == "text 3"
+    monkeypatch.setattr(pdf_text_utils, "MAX_PDF_PAGES", 5)            # page limit raised
+    assert prepare()["full_text"] == "text 4"
+    assert (len(extracted), db["article_text"].upserts) == (4, 4)
+    assert prepare()["full_text"] == "text 4"
+    assert len(extracted) == 4
@@ -0,0 +1,88 @@
+from backfill_text import scan_library
+
+def test_scan_library_includes_review_folders(tmp_path):
+    (tmp_path / "approved").mkdir()
+    (tmp_path / "rejected").mkdir()
+    (tmp_path / "a.pdf").write_bytes(b"%PDF")
+    (tmp_path / "approved" / "b.pdf").write_bytes(b"%PDF")
+    (tmp_path / "rejected" / "c.PDF").write_bytes(b"%PDF")
+    (tmp_path / "notes.txt").write_text("x")
+
+    found = scan_library(str(tmp_path))
+
+    assert sorted(found) == ["a.pdf", "b.pdf", "c.PDF"]
+    assert found["b.pdf"] == str(tmp_path / "approved" / "b.pdf")
+
+
+import backfill_text
+from backfill_text import pending_jobs
+from pdf_sandbox import ExtractionFailed
+from pdf_text_utils import pdf_text_key
+
+
+class FakeColl:
+    def __init__(self, docs=()):
+        self.docs, self.ops = list(docs), []
+
+    def find(self, query, projection=None):
+        if "pubmed_id" in query:
+            return [d for d in self.docs if d["pubmed_id"] in query["pubmed_id"]["$in"]]
+        return list(self.docs)
+
+    def bulk_write(self, ops, ordered=True):
+        self.ops.extend(ops)
+
+
+def _library(tmp_path):
+    paths = {}
+    for name in ("a", "b", "c"):
+        paths[name] = tmp_path / f"{name}.pdf"
+        paths[name].write_bytes(b"%PDF " + name.encode())
+    return paths
+
+
+def test_pending_jobs_skips_current_keys(tmp_path):
+    paths = _library(tmp_path)
+    db = {"article_text": FakeColl([
+        {"pubmed_id": "1", "text_key": pdf_text_key(str(paths["a"]))},   # current
+        {"pubmed_id": "2", "text_key": "old|pypdf2|2"},                  # stale
+    ])}
+    jobs = [("1", str(paths["a"])), ("2", str(paths["b"])), ("3", str(paths["c"]))]
+
+    todo = pending_jobs(db, jobs)
+    assert [(pid, key) for pid, _, key in todo] == \
+        [("2", pdf_text_key(str(paths["b"]))), ("3", pdf_text_key(str(paths["c"])))]
+    assert [pid for pid, _, _ in pending_jobs(db, jobs, force=True)] == ["1", "2", "3"]
+
+
+def test_failed_extraction_stores_no_key_and_rest_is_flushed(tmp_path, monkeypatch):
+    paths = _library(tmp_path)
+    db = {
+        "articles": FakeColl([{"pubmed_id": pid, "pdf_file": f"pdfs/{name}.pdf"}
+                              for pid, name in (("1", "a"), ("2", "b"), ("3", "c"))]),
+        "article_text": FakeColl(),
+    }
+
+    class FakeSandbox:
+        def __init__(self, size):
+            pass
+
+        def extract(self, path):
+            if path.endswith("b.pdf"):
+                raise ExtractionFailed(path, "timeout", "no result after 60s", 60.0)
+            return f"text of {path}"
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(backfill_text, "connect_to_mongo", lambda: db)
+    monkeypatch.setattr(backfill_text, "scan_library",
+                        lambda: {p.name: str(p) for p in paths.values()})
+    monkeypatch.setattr(backfill_text, "SandboxPool", FakeSandbox)
+
+    backfill_text.run_backfill(workers=2, batch_size=50)
+
+    written = {op._filter["pubmed_id"]: op._doc["$set"] for op in db["article_text"].ops}
+    assert sorted(written) == ["1", "3"]
+    assert written["3"] == {"full_text": f"text of {paths['c']}",
+                            "text_key": pdf_text_key(str(paths["c"]))}
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from bulk_writer import BulkWriter
+
+class FakeCollection:
+    def __init__(self, fail_pids=()):
+        self.calls, self.fail_pids = [], set(fail_pids)
+
+    def bulk_write(self, ops, ordered=True):
+        self.calls.append(list(ops))
+        for i, op in enumerate(ops):
+            if op._filter["pubmed_id"] in self.fail_pids:
+                self.fail_pids.discard(op._filter["pubmed_id"])
+                raise BulkWriteError({"writeErrors": [{"index": i, "errmsg": "boom"}],
+                                      "nUpserted": i})
+        return SimpleNamespace(bulk_api_result={"nUpserted": len(ops)})
+
+def _op(pid):
+    return UpdateOne({"pubmed_id": pid}, {"$set": {"title": pid}}, upsert=True)
+
+def test_flushes_by_size_and_on_close():
+    db = {"articles": FakeCollection()}
+    writer = BulkWriter(db, batch_size=2, flush_seconds=3600)
+    for pid in "abc":
+        writer.add("articles", _op(pid))
+    assert [len(c) for c in db["articles"].calls] == [2]
+    writer.close()
+    assert [len(c) for c in db["articles"].calls] == [2, 1]
+    assert writer.written == 3 and not writer.errors
+
+def test_ordered_batch_resumes_after_a_failed_op():
+    db = {"articles": FakeCollection(fail_pids={"b"})}
+    with BulkWriter(db, batch_size=100, flush_seconds=3600, ordered=True) as writer:
+        for pid in "abcd":
+            writer.add("articles", _op(pid))
+    assert [[op._filter["pubmed_id"] for op in c] for c in db["articles"].calls] == \
+           [["a", "b", "c", "d"], ["c", "d"]]
+    assert writer.written == 3
+    assert [(e["pubmed_id"], e["error"]) for e in writer.errors] == [("b", "boom")]
@@ -0,0 +1,16 @@
+import cpu_pool
+from tag_utils import suggest_tags
+
+def test_run_cpu_tags_in_worker_process():
+    text = ("Transcatheter aortic valve implantation outcomes in elderly patients "
+            "with severe aortic stenosis and permanent pacemaker implantation.")
+    try:
+        assert cpu_pool.run_cpu(suggest_tags, text, 5) == suggest_tags(text, 5)
+    finally:
+        cpu_pool.shutdown_cpu_pool()
+
+def test_cpu_pool_spawns_workers():
+    try:
+        assert cpu_pool.get_cpu_pool()._mp_context.get_start_method() == "spawn"
+    finally:
+        cpu_pool.shutdown_cpu_pool()
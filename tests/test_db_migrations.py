@@ -0,0 +1,82 @@
+import pytest
+
+from db_migrations import (KNOWN_QUERIES, MIGRATIONS, MigrationError, apply_migrations,
+                           plan_stages)
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs, self.indexes, self.specs = [], [], []
+
+    def find(self, query=None, projection=None):
+        return list(self.docs)
+
+    def insert_one(self, doc):
+        self.docs.append(doc)
+
+    def aggregate(self, pipeline):
+        return []
+
+    def list_indexes(self):
+        return list(self.specs)
+
+    def create_indexes(self, models):
+        for m in models:
+            if m.document["name"] in self.indexes:
+                raise AssertionError(f"index {m.document['name']} created twice")
+            self.indexes.append(m.document["name"])
+            self.specs.append(m.document)
+
+
+class FakeDB(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+
+def test_migrations_run_once_and_are_recorded():
+    db = FakeDB()
+    assert apply_migrations(db) == [v for v, _, _ in MIGRATIONS]
+    assert "pubmed_id_1" in db["articles"].indexes
+    assert "status_1_publication_date_-1" in db["articles"].indexes
+    assert "pdf_file_1" in db["articles"].indexes
+    assert apply_migrations(db) == []
+    assert len(db["articles"].indexes) == len(set(db["articles"].indexes))
+
+
+def test_migration_versions_are_increasing():
+    versions = [v for v, _, _ in MIGRATIONS]
+    assert versions == sorted(set(versions))
+
+
+def test_plan_stages_finds_nested_collscan():
+    indexed = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}
+    scanned = {"stage": "SUBPLAN", "inputStage": {"stage": "SORT", "inputStage": {
+        "stage": "OR", "inputStages": [{"stage": "IXSCAN"}, {"stage": "COLLSCAN"}]}}}
+    assert "COLLSCAN" not in plan_stages(indexed)
+    assert "COLLSCAN" in plan_stages(scanned)
+
+
+def test_existing_indexes_are_adopted_under_their_own_names():
+    db = FakeDB()
+    # setup_text_index.py / older recompute_titles runs, key values as stored (floats)
+    db["article_text"].specs.append({"name": "pubmed_id_1", "key": {"pubmed_id": 1.0},
+                                     "unique": True})
+    db["articles"].specs.append({"name": "title_words_1", "key": {"title_words": 1}})
+    apply_migrations(db)
+    assert db["article_text"].indexes == []
+    assert "title_words_1" not in db["articles"].indexes
+
+
+def test_non_unique_index_on_unique_key_is_reported():
+    db = FakeDB()
+    db["article_text"].specs.append({"name": "pid", "key": {"pubmed_id": 1}})
+    with pytest.raises(MigrationError):
+        apply_migrations(db)
+    assert db["schema_migrations"].docs == []
+
+
+def test_analytics_queries_are_checked():
+    queries = [(c, q) for c, q, _ in KNOWN_QUERIES]
+    assert ("articles", {"status": {"$exists": False}}) in queries
+    assert ("articles", {"pdf_file": {"$regex": r"\.pdf$"}}) in queries
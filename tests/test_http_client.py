@@ -0,0 +1,35 @@
+import http_client
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status_code = status
+        self.headers = {}
+
+    def close(self):
+        pass
+
+class FakeSession:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+
+    def request(self, method, url, **kwargs):
+        return FakeResponse(self.statuses.pop(0))
+
+def test_request_retries_429_and_reports_timings(monkeypatch):
+    monkeypatch.setattr(http_client, "get_session", lambda: FakeSession([429, 503, 200]))
+    monkeypatch.setattr(http_client.time, "sleep", lambda s: None)
+    seen = []
+    hook = lambda method, url, status, elapsed, attempt: seen.append((status, attempt))
+    http_client.add_timing_hook(hook)
+    try:
+        response = http_client.get("https://example.org/")
+    finally:
+        http_client.remove_timing_hook(hook)
+    assert response.status_code == 200
+    assert seen == [(429, 0), (503, 1), (200, 2)]
+
+def test_request_returns_last_response_when_retries_exhausted(monkeypatch):
+    monkeypatch.setattr(http_client, "get_session", lambda: FakeSession([500, 500]))
+    monkeypatch.setattr(http_client.time, "sleep", lambda s: None)
+    response = http_client.get("https://example.org/", max_retries=1)
+    assert response.status_code == 500
@@ -0,0 +1,57 @@
+import importlib
+
+import pytest
+
+import article_stages
+import config
+
+class FakeArticles:
+    def __init__(self, stored):
+        self.stored, self.queries = stored, []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        return [{"_id": pid, "pubmed_id": pid} for pid in query["pubmed_id"]["$in"]
+                if pid in self.stored]
+
+def _setup(monkeypatch, stored):
+    db = {"articles": FakeArticles(stored)}
+    fetched = []
+    monkeypatch.setattr(article_stages, "search_pubmed_ids",
+                        lambda q, s, e: ["1", "2", "3"])
+    monkeypatch.setattr(article_stages, "fetch_pubmed_details_batch",
+                        lambda ids: fetched.extend(ids) or {i: {"pubmed_id": i} for i in ids})
+    monkeypatch.setattr(article_stages, "search_and_fetch",
+                        lambda q, s, e: [[{"pubmed_id": i} for i in ("1", "2", "3")]])
+    return db, fetched
+
+def test_known_ids_are_resolved_in_one_query_and_not_refetched(monkeypatch):
+    db, fetched = _setup(monkeypatch, stored={"2"})
+    known, batches = article_stages.fetch_keyword(db, "tavi", None, None, policy="refresh")
+    items = [it for batch in batches for it in batch]
+    assert [d["pubmed_id"] for d in known] == ["2"]
+    assert [it["details"]["pubmed_id"] for it in items] == ["1", "3"] == fetched
+    assert len(db["articles"].queries) == 1
+
+    known, batches = article_stages.fetch_keyword(db, "tavi", None, None, policy="skip")
+    assert known == [] and [it["details"]["pubmed_id"] for b in batches for it in b] == ["1", "3"]
+
+def test_full_policy_reprocesses_with_prefetched_existing(monkeypatch):
+    db, fetched = _setup(monkeypatch, stored={"2"})
+    known, batches = article_stages.fetch_keyword(db, "tavi", None, None, policy="full")
+    items = [it for batch in batches for it in batch]
+    assert known == [] and fetched == []
+    assert [(it["details"]["pubmed_id"], it["existing"]) for it in items] == \
+        [("1", None), ("2", {"_id": "2", "pubmed_id": "2"}), ("3", None)]
+
+def test_unknown_policy_is_rejected(monkeypatch):
+    db, fetched = _setup(monkeypatch, stored={"2"})
+    with pytest.raises(ValueError):
+        article_stages.fetch_keyword(db, "tavi", None, None, policy="refesh")
+    monkeypatch.setenv("KNOWN_ARTICLE_POLICY", "refesh")
+    try:
+        with pytest.raises(ValueError, match="refesh"):
+            importlib.reload(config)
+    finally:
+        monkeypatch.delenv("KNOWN_ARTICLE_POLICY")
+        importlib.reload(config)
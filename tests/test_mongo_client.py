@@ -0,0 +1,37 @@
+import os
+from types import SimpleNamespace
+
+import mongo_client
+
+
+def test_one_client_per_uri_and_fresh_after_fork(monkeypatch):
+    mongo_client.close_clients()
+    a = mongo_client.get_client("mongodb://localhost:27017/")
+    assert mongo_client.get_client("mongodb://localhost:27017/") is a
+    assert mongo_client.get_db().client is mongo_client.get_client()
+
+    monkeypatch.setattr(mongo_client, "_pid", os.getpid() + 1)   # as seen from a forked child
+    b = mongo_client.get_client("mongodb://localhost:27017/")
+    assert b is not a
+    assert mongo_client._pid == os.getpid()
+    a.close()
+    mongo_client.close_clients()
+
+
+def test_client_uses_configured_pool_options():
+    client = mongo_client._new_client("mongodb://localhost:27017/")
+    try:
+        assert client.options.pool_options.max_pool_size == mongo_client.MONGO_MAX_POOL_SIZE
+        assert client.read_preference.mongos_mode == mongo_client.MONGO_READ_PREFERENCE
+    finally:
+        client.close()
+
+
+def test_command_stats_summarise_latency():
+    stats = mongo_client.CommandStats()
+    for micros in (1000, 3000):
+        stats.succeeded(SimpleNamespace(command_name="find", duration_micros=micros))
+    stats.failed(SimpleNamespace(command_name="insert", duration_micros=500))
+    summary = stats.summary()
+    assert summary["find"] == {"count": 2, "failed": 0, "avg_ms": 2.0, "max_ms": 3.0}
+    assert summary["insert"]["failed"] == 1
@@ -0,0 +1,39 @@
+import oa_utils
+
+OA_XML = b"""<OA><records returned-count="1" total-count="1">
+  <record id="PMC123" citation="J Test. 2025" license="CC BY" retracted="no">
+    <link format="tgz" updated="2025-01-01" href="ftp://ftp.ncbi.nlm.nih.gov/pub/pmc/oa_package/a/b/PMC123.tar.gz" />
+    <link format="pdf" updated="2025-01-01" href="ftp://ftp.ncbi.nlm.nih.gov/pub/pmc/oa_pdf/a/b/test.PMC123.pdf" />
+  </record>
+</records></OA>"""
+
+NOT_OA_XML = b"""<OA><error code="idIsNotOpenAccess">identifier 'PMC999' is not Open Access</error></OA>"""
+
+def test_resolve_oa_parses_record_and_memoizes(monkeypatch):
+    calls = []
+    def fake_fetch(method, url, endpoint, params=None, **kwargs):
+        calls.append(params["id"])
+        return OA_XML if params["id"] == "PMC123" else NOT_OA_XML
+    monkeypatch.setattr(oa_utils.response_cache, "fetch", fake_fetch)
+    oa_utils.clear_oa_cache()
+
+    record = oa_utils.resolve_oa("PMC123")
+    assert record["access"] == "Free"
+    assert record["license"] == "CC BY"
+    assert record["pdf_href"].endswith("test.PMC123.pdf")
+    assert record["tgz_href"].endswith("PMC123.tar.gz")
+    assert oa_utils.resolve_oa("PMC123") is record
+
+    assert oa_utils.resolve_oa("PMC999")["access"] == "Paid"
+    assert calls == ["PMC123", "PMC999"]
+
+def test_offline_miss_leaves_access_unknown(monkeypatch):
+    import pubmed_utils
+    def fake_fetch(method, url, endpoint, params=None, **kwargs):
+        raise oa_utils.response_cache.CacheMiss("Offline mode: no cached oa response")
+    monkeypatch.setattr(oa_utils.response_cache, "fetch", fake_fetch)
+    oa_utils.clear_oa_cache()
+
+    assert oa_utils.resolve_oa("PMC5")["access"] is None
+    article = pubmed_utils._with_access({"pubmed_id": "5", "pmcid": "PMC5"})
+    assert "access" not in article
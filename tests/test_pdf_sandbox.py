@@ -0,0 +1,55 @@
+import pymupdf
+import pytest
+from pdf_sandbox import SandboxPool, ExtractionFailed
+
+def test_sandbox_extracts_and_recycles_workers(tmp_path):
+    pdf = tmp_path / "sample.pdf"
+    doc = pymupdf.open()
+    doc.new_page().insert_text((72, 72), "aortic stenosis")
+    doc.save(str(pdf))
+    doc.close()
+
+    pool = SandboxPool(size=1, timeout=60, max_files=1)
+    try:
+        assert "aortic stenosis" in pool.extract(str(pdf))
+        assert "aortic stenosis" in pool.extract(str(pdf))   # fresh worker
+    finally:
+        pool.close()
+
+def test_sandbox_reports_timeout(tmp_path):
+    pdf = tmp_path / "sample.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    pool = SandboxPool(size=1, timeout=0)
+    try:
+        with pytest.raises(ExtractionFailed) as exc:
+            pool.extract(str(pdf))
+        assert exc.value.kind == "timeout"
+        assert exc.value.as_error()["stage"] == "pdf_extract"
+    finally:
+        pool.close()
+
+def test_sandbox_extracts_page_ranges(tmp_path):
+    pdf = tmp_path / "sample.pdf"
+    doc = pymupdf.open()
+    for text in ("first", "second", "third"):
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(str(pdf))
+    doc.close()
+
+    pool = SandboxPool(size=1, timeout=60)
+    try:
+        pages = pool.extract_pages(str(pdf), 1, 5)
+        assert len(pages) == 2 and "second" in pages[0]
+    finally:
+        pool.close()
+
+def test_sandbox_reports_unreadable_pdf(tmp_path):
+    pdf = tmp_path / "broken.pdf"
+    pdf.write_bytes(b"%PDF-1.4 not really a pdf")
+    pool = SandboxPool(size=1, timeout=60)
+    try:
+        with pytest.raises(ExtractionFailed) as exc:
+            pool.extract(str(pdf))
+        assert exc.value.kind == "exception"
+    finally:
+        pool.close()
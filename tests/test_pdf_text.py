@@ -0,0 +1,47 @@
+import pytest
+import pymupdf
+from pdf_text_utils import extract_pdf_text, extract_pdf_pages, iter_pdf_pages, pdf_text_key
+
+def _make_pdf(path, pages):
+    doc = pymupdf.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+
+def test_engines_agree_on_first_pages(tmp_path):
+    pdf = tmp_path / "sample.pdf"
+    _make_pdf(pdf, ["aortic stenosis", "valve implantation", "third page"])
+    for engine in ("pymupdf", "pypdf2"):
+        text = extract_pdf_text(str(pdf), engine=engine, max_pages=2)
+        assert "aortic stenosis" in text and "valve implantation" in text
+        assert "third page" not in text
+
+def test_missing_file_returns_empty(tmp_path):
+    assert extract_pdf_text(str(tmp_path / "Not available")) == ""
+
+def test_text_key_tracks_content_engine_and_pages(tmp_path):
+    pdf = tmp_path / "sample.pdf"
+    _make_pdf(pdf, ["aortic stenosis"])
+    key = pdf_text_key(str(pdf), engine="pymupdf", max_pages=2)
+    assert key == pdf_text_key(str(pdf), engine="pymupdf", max_pages=2)
+    assert key != pdf_text_key(str(pdf), engine="pypdf2", max_pages=2)
+    assert key != pdf_text_key(str(pdf), engine="pymupdf", max_pages=5)
+    _make_pdf(pdf, ["mitral regurgitation"])
+    assert key != pdf_text_key(str(pdf), engine="pymupdf", max_pages=2)
+
+def test_iter_pdf_pages_is_lazy_and_resumable(tmp_path):
+    pdf = tmp_path / "sample.pdf"
+    _make_pdf(pdf, ["first", "second", "third"])
+    pages = iter_pdf_pages(str(pdf))
+    assert "first" in next(pages)
+    pages.close()
+    assert ["third" in t for t in extract_pdf_pages(str(pdf), 2, 10)] == [True]
+    assert extract_pdf_text(str(pdf), max_pages=3, max_chars=1).strip() == "first"
+
+def test_strict_raises_when_every_engine_fails(tmp_path):
+    pdf = tmp_path / "broken.pdf"
+    pdf.write_bytes(b"%PDF-1.4 not really a pdf")
+    assert extract_pdf_text(str(pdf)) == ""
+    with pytest.raises(Exception):
+        extract_pdf_text(str(pdf), strict=True)
@@ -0,0 +1,53 @@
+import io
+import tarfile
+import pdf_utils
+
+def _make_tgz():
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        for name, data in [("PMC1/fig1.jpg", b"x" * 1000),
+                           ("PMC1/paper.pdf", b"%PDF-1.4 test"),
+                           ("PMC1/supp.pdf", b"%PDF-1.4 supplement")]:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+class FakeStreamResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self.raw = io.BytesIO(body)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+def test_stream_tgz_saves_first_pdf(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_utils, "PDF_DIR", str(tmp_path))
+    monkeypatch.setattr(pdf_utils.http_client, "get",
+                        lambda url, **kw: FakeStreamResponse(_make_tgz()))
+
+    path = pdf_utils._stream_pmc_tgz("https://example.org/PMC1.tar.gz", "PMC1", "out.pdf")
+
+    assert path == str(tmp_path / "out.pdf")
+    assert (tmp_path / "out.pdf").read_bytes() == b"%PDF-1.4 test"
+    assert not (tmp_path / "out.pdf.part").exists()
+
+def test_stream_pdf_closes_response_on_miss(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_utils, "PDF_DIR", str(tmp_path))
+    closed = []
+
+    class HtmlResponse(FakeStreamResponse):
+        headers = {"content-type": "text/html"}
+
+        def __exit__(self, *exc):
+            closed.append(True)
+            return False
+
+    monkeypatch.setattr(pdf_utils.http_client, "get", lambda url, **kw: HtmlResponse(b"<html>"))
+    assert pdf_utils._stream_pmc_pdf("ftp://example.org/a.pdf", "out.pdf") is None
+    assert closed == [True]
+    assert not (tmp_path / "out.pdf").exists()
@@ -0,0 +1,62 @@
+import asyncio
+import concurrent.futures
+import pipeline
+
+def test_run_pipeline_passes_every_article_through_all_stages(monkeypatch):
+    batches = [[{"pubmed_id": str(i), "title": f"T{i}"} for i in range(7)],
+               [{"pubmed_id": None, "error": "window failed"}]]
+    errors, stored, persisted = [], [], []
+
+    # the lambdas below can't be pickled into the real process pool
+    cpu = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(pipeline, "get_cpu_pool", lambda: cpu)
+    known = [{"_id": 99, "pubmed_id": "99"}]
+    items = [[{"details": d, "existing": None} for d in batch] for batch in batches]
+    monkeypatch.setattr(pipeline, "fetch_keyword", lambda db, kw, s, e: (known, items))
+    monkeypatch.setattr(pipeline, "refresh_article", lambda db, doc, writer: doc)
+    monkeypatch.setattr(pipeline, "record_error",
+                        lambda db, run_log_id, pid, error: errors.append(error))
+    monkeypatch.setattr(pipeline, "prepare_article", lambda d, db, abbr, existing: existing)
+    monkeypatch.setattr(pipeline, "resolve_pdf", lambda d: f"{d['pubmed_id']}.pdf")
+    monkeypatch.setattr(pipeline, "extract_text_logged",
+                        lambda db, run_log_id, pid, pdf, offload:
+                            None if pid == "3" else f"text of {pdf}")   # "3" fails
+    monkeypatch.setattr(pipeline, "lookup_text", lambda db, pid, pdf: ("key", None))
+    monkeypatch.setattr(pipeline, "store_text",
+                        lambda db, pid, text, key, writer: stored.append((pid, text)))
+    tag_calls = []
+    def tag_articles(items, executor):
+        tag_calls.append(len(items))
+        return [[d["title"]] for d, text, existing in items]
+    monkeypatch.setattr(pipeline, "tag_articles", tag_articles)
+    monkeypatch.setattr(pipeline, "persist_article",
+                        lambda db, d, existing, pdf, tags, writer: persisted.append((d["pubmed_id"], tags)))
+
+    results = asyncio.run(pipeline.run_pipeline(["tavi"], None, None, None, {}, None))
+
+    assert sorted(r["pubmed_id"] for r in results if not r.get("skipped")) == \
+        [str(i) for i in range(7)] + ["99"]
+    assert errors == ["window failed"]
+    assert sorted(stored) == sorted((str(i), f"text of {i}.pdf") for i in range(7) if i != 3)
+    assert sorted(persisted) == sorted((str(i), [f"T{i}"]) for i in range(7))
+    assert sum(tag_calls) == 7
+
+def test_batch_stage_takes_everything_queued_up_to_batch_size():
+    async def run():
+        inq, outq = asyncio.Queue(), asyncio.Queue()
+        for i in range(5):
+            inq.put_nowait(i)
+        inq.put_nowait(pipeline._DONE)
+        batches = []
+
+        async def fn(batch):
+            batches.append(batch)
+            return batch
+        await pipeline._run_batch_stage(fn, inq, outq, 1, 3)
+        out = []
+        while (item := outq.get_nowait()) is not pipeline._DONE:
+            out.append(item)
+        return batches, out
+
+    batches, out = asyncio.run(run())
+    assert batches == [[0, 1, 2], [3, 4]] and out == [0, 1, 2, 3, 4]
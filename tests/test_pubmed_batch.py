@@ -0,0 +1,90 @@
+import pubmed_utils
+
+BATCH_XML = """<?xml version="1.0"?>
+<PubmedArticleSet>
+  <PubmedArticle>
+    <MedlineCitation>
+      <PMID>111</PMID>
+      <Article>
+        <Journal><Title>Journal One</Title></Journal>
+        <ArticleTitle>First article</ArticleTitle>
+        <AuthorList><Author><LastName>Smith</LastName><ForeName>Ann</ForeName></Author></AuthorList>
+      </Article>
+    </MedlineCitation>
+    <PubmedData><ArticleIdList><ArticleId IdType="pubmed">111</ArticleId></ArticleIdList></PubmedData>
+  </PubmedArticle>
+  <PubmedArticle>
+    <MedlineCitation>
+      <PMID>222</PMID>
+      <Article>
+        <Journal><Title>Journal Two</Title></Journal>
+        <ArticleTitle>Second article</ArticleTitle>
+      </Article>
+    </MedlineCitation>
+    <PubmedData><ArticleIdList><ArticleId IdType="pubmed">222</ArticleId></ArticleIdList></PubmedData>
+  </PubmedArticle>
+</PubmedArticleSet>"""
+
+def test_fetch_batch_splits_articles_and_reports_missing(monkeypatch):
+    calls = []
+    def fake_fetch(method, url, endpoint, data=None, **kwargs):
+        calls.append(data["id"])
+        return BATCH_XML.encode()
+    monkeypatch.setattr(pubmed_utils.response_cache, "fetch", fake_fetch)
+
+    results = pubmed_utils.fetch_pubmed_details_batch(["111", "222", "333"])
+
+    assert calls == ["111,222,333"]
+    assert list(results) == ["111", "222", "333"]
+    assert results["111"]["title"] == "First article"
+    assert results["111"]["journal"] == "Journal One"
+    assert results["111"]["authors"] == ["Ann Smith"]
+    assert results["222"]["title"] == "Second article"
+    assert results["222"]["authors"] == []
+    assert "error" in results["333"]
+
+def test_iter_history_streams_windows_up_to_limit(monkeypatch):
+    windows = []
+    def fake_fetch(method, url, endpoint, data=None, **kwargs):
+        windows.append((data["retstart"], data["retmax"], data["WebEnv"]))
+        return BATCH_XML.encode()
+    monkeypatch.setattr(pubmed_utils.response_cache, "fetch", fake_fetch)
+
+    handle = {"webenv": "ENV", "query_key": "1", "count": 5}
+    batches = list(pubmed_utils.iter_pubmed_history(handle, max_results=3, batch_size=2))
+
+    assert windows == [(0, 2, "ENV"), (2, 1, "ENV")]
+    assert [d["pubmed_id"] for d in batches[0]] == ["111", "222"]
+
+def test_search_ids_reads_uilist_windows_and_reports_cap(monkeypatch, capsys):
+    windows = []
+    def fake_fetch(method, url, endpoint, data=None, **kwargs):
+        windows.append((data["retstart"], data["retmax"], data["rettype"]))
+        start = data["retstart"]
+        return "\n".join(str(100 + i) for i in range(start, start + data["retmax"])).encode()
+    monkeypatch.setattr(pubmed_utils.response_cache, "fetch", fake_fetch)
+    monkeypatch.setattr(pubmed_utils, "ENTREZ_USE_HISTORY", True)
+    monkeypatch.setattr(pubmed_utils, "UILIST_BATCH_SIZE", 2)
+    monkeypatch.setattr(pubmed_utils, "search_pubmed_history",
+                        lambda q, s, e: {"webenv": "ENV", "query_key": "1", "count": 7})
+
+    ids = pubmed_utils.search_pubmed_ids("tavi", None, None, max_results=5)
+
+    assert ids == ["100", "101", "102", "103", "104"]
+    assert windows == [(0, 2, "uilist"), (2, 2, "uilist"), (4, 1, "uilist")]
+    assert "matched 7 articles; only the first 5" in capsys.readouterr().out
+
+def test_date_range_search_is_one_keyed_esearch(monkeypatch, capsys):
+    import datetime, json
+    calls = []
+    def fake_fetch(method, url, endpoint, params=None, **kwargs):
+        calls.append(params)
+        return json.dumps({"esearchresult": {"count": "3", "idlist": ["1", "2", "3"]}}).encode()
+    monkeypatch.setattr(pubmed_utils.response_cache, "fetch", fake_fetch)
+    monkeypatch.setattr(pubmed_utils, "NCBI_API_KEY", "KEY")
+
+    day = datetime.date(2024, 1, 1)
+    assert pubmed_utils.search_pubmed_date_range("tavi", day, day, max_results=20000) == ["1", "2", "3"]
+    assert len(calls) == 1
+    assert calls[0]["retmax"] == pubmed_utils.ESEARCH_MAX_RETMAX and calls[0]["api_key"] == "KEY"
+    assert "only the first" not in capsys.readouterr().out
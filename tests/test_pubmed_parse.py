@@ -11,3 +11,21 @@ def test_parse_pub_date_partial():
     tag = BeautifulSoup(xml, "xml").PubDate
     # Accepts "2019-07-01" or "2019-07" depending on your function
     assert "2019" in parse_pub_date(tag)
+
+def test_iter_pubmed_articles_pmcid_and_crosscheck():
+    import io
+    from pubmed_xml import iter_pubmed_articles
+    xml = b"""<PubmedArticleSet>
+      <PubmedArticle><MedlineCitation><PMID>1</PMID></MedlineCitation>
+        <PubmedData><ArticleIdList>
+          <ArticleId IdType="pubmed">1</ArticleId><ArticleId IdType="pmc">123</ArticleId>
+        </ArticleIdList></PubmedData></PubmedArticle>
+      <PubmedArticle><MedlineCitation><PMID>2</PMID></MedlineCitation>
+        <PubmedData><ArticleIdList>
+          <ArticleId IdType="pubmed">999</ArticleId><ArticleId IdType="pmc">PMC456</ArticleId>
+        </ArticleIdList></PubmedData></PubmedArticle>
+    </PubmedArticleSet>"""
+    first, second = iter_pubmed_articles(io.BytesIO(xml))
+    assert first["pmcid"] == "PMC123"
+    assert first["title"] == "No Title Found"
+    assert second["pmcid"] is None
@@ -0,0 +1,21 @@
+import asyncio
+import time
+from rate_limit import TokenBucket
+
+def test_token_bucket_spaces_requests():
+    bucket = TokenBucket(rate=20)
+    t0 = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    # first token is free, the other four wait 1/20 s each
+    assert time.monotonic() - t0 >= 0.19
+
+def test_token_bucket_async():
+    bucket = TokenBucket(rate=20)
+
+    async def run():
+        await asyncio.gather(*(bucket.acquire_async() for _ in range(5)))
+
+    t0 = time.monotonic()
+    asyncio.run(run())
+    assert time.monotonic() - t0 >= 0.19
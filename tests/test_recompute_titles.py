@@ -0,0 +1,113 @@
+import pytest
+from pymongo.errors import BulkWriteError
+
+import recompute_titles
+from abbrev_utils import compute_updated_title, title_words, term_words
+from recompute_titles import diff_maps, recompute
+from utils import locate_pdf, pdf_filename
+
+def test_diff_maps_reports_added_changed_and_removed_terms():
+    old = {"Aortic Stenosis": "AS", "mitral valve": "MV", "left ventricle": "LV"}
+    new = {"aortic stenosis": "AS", "mitral valve": "MiV", "tricuspid valve": "TV"}
+    assert diff_maps(old, new) == {"mitral valve", "left ventricle", "tricuspid valve"}
+    assert diff_maps(None, new) == set(new)
+
+def test_title_words_cover_every_term_that_matches():
+    title = "Valve-in-valve TAVI for failed (surgical) aortic valve prostheses."
+    abbr_map = {"valve in valve": "ViV", "surgical aortic valve": "SAV"}
+    details = {"title": title, "authors": ["Jane Doe"], "publication_date": "2024-01-01"}
+    assert compute_updated_title(details, abbr_map).startswith("ViV TAVI for failed SAV")
+    for term in abbr_map:
+        assert set(term_words(term)) <= set(title_words(title))
+
+
+class FakeColl:
+    def __init__(self, docs=()):
+        self.docs, self.writes, self.fail = list(docs), [], None
+
+    def find(self, query, projection=None):
+        if "title_words" in query and "$all" in query["title_words"]:
+            words = query["title_words"]["$all"]
+            return [d for d in self.docs if set(words) <= set(d.get("title_words", []))]
+        return [d for d in self.docs if "title_words" not in d]
+
+    def find_one(self, query):
+        return None
+
+    def update_one(self, query, update, upsert=False):
+        self.writes.append(("update_one", query, update))
+
+    def bulk_write(self, ops, ordered=True):
+        if self.fail:
+            raise self.fail
+        self.writes.append(("bulk_write", [(op._filter, op._doc) for op in ops]))
+
+
+class FakeDB(dict):
+    def __missing__(self, name):
+        return self.setdefault(name, FakeColl())
+
+
+def _article(_id, title, pdf_file=None):
+    doc = {"_id": _id, "pubmed_id": str(_id), "title": title, "authors": ["Jane Doe"],
+           "publication_date": "2024-01-01", "title_words": title_words(title),
+           "pdf_file": pdf_file}
+    doc["updated_title"] = compute_updated_title(doc, {})
+    return doc
+
+ABBR = {"aortic stenosis": "AS"}
+
+def _db(*docs):
+    db = FakeDB()
+    db["articles"] = FakeColl(docs)
+    return db
+
+def test_recompute_updates_only_articles_found_through_title_words():
+    hit = _article(1, "Aortic stenosis outcomes")
+    miss = _article(2, "Mitral regurgitation outcomes")
+    db = _db(hit, miss)
+
+    assert recompute(db, ABBR) == (1, 1)
+
+    [(_, ops)] = [w for w in db["articles"].writes if w[0] == "bulk_write"]
+    assert ops == [({"_id": 1}, {"$set": {"updated_title": compute_updated_title(hit, ABBR)}})]
+    assert db["abbreviation_state"].writes[0][2]["$set"]["pairs"] == [["aortic stenosis", "AS"]]
+
+def test_dry_run_writes_nothing():
+    db = _db(_article(1, "Aortic stenosis outcomes"))
+    del db["articles"].docs[0]["title_words"]       # would be backfilled by a real run
+    db["articles"].docs.append(_article(2, "Aortic stenosis in women"))
+
+    assert recompute(db, ABBR, dry_run=True) == (1, 1)
+    assert db["articles"].writes == [] and db["abbreviation_state"].writes == []
+
+def _pdf_library(tmp_path, monkeypatch, doc):
+    (tmp_path / "approved").mkdir()
+    old = tmp_path / "approved" / doc["pdf_file"]
+    old.write_bytes(b"%PDF")
+    monkeypatch.setattr(recompute_titles, "locate_pdf", lambda f: locate_pdf(f, str(tmp_path)))
+    return old
+
+def test_rename_pdfs_moves_the_file_and_updates_pdf_file(tmp_path, monkeypatch):
+    doc = _article(1, "Aortic stenosis outcomes", "old.pdf")
+    old = _pdf_library(tmp_path, monkeypatch, doc)
+    db = _db(doc)
+
+    recompute(db, ABBR, rename_pdfs=True)
+
+    new_name = pdf_filename(compute_updated_title(doc, ABBR))
+    assert not old.exists() and (tmp_path / "approved" / new_name).exists()
+    [(_, [(_, update)])] = db["articles"].writes
+    assert update["$set"]["pdf_file"] == new_name
+
+def test_failed_write_renames_pdfs_back(tmp_path, monkeypatch):
+    doc = _article(1, "Aortic stenosis outcomes", "old.pdf")
+    old = _pdf_library(tmp_path, monkeypatch, doc)
+    db = _db(doc)
+    db["articles"].fail = BulkWriteError({"writeErrors": [{"index": 0, "errmsg": "boom"}]})
+
+    with pytest.raises(BulkWriteError):
+        recompute(db, ABBR, rename_pdfs=True)
+
+    assert old.exists() and list((tmp_path / "approved").iterdir()) == [old]
+    assert db["abbreviation_state"].writes == []
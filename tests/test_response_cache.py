@@ -0,0 +1,49 @@
+import pytest
+import response_cache
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(response_cache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(response_cache, "CACHE_ENABLED", True)
+    monkeypatch.setattr(response_cache, "CACHE_OFFLINE", False)
+    monkeypatch.setattr(response_cache, "_total_bytes", None)
+    calls = []
+    def fake_request(method, url, params=None, data=None, **kwargs):
+        calls.append(params)
+        return FakeResponse(b"<xml>%d</xml>" % len(calls))
+    monkeypatch.setattr(response_cache.http_client, "request", fake_request)
+    return calls
+
+def test_second_fetch_is_served_from_cache(cache):
+    first = response_cache.fetch("GET", "https://x/efetch", "efetch", params={"id": "1", "api_key": "a"})
+    second = response_cache.fetch("GET", "https://x/efetch", "efetch", params={"id": "1", "api_key": "b"})
+    assert first == second == b"<xml>1</xml>"
+    assert len(cache) == 1
+
+def test_offline_mode_raises_on_miss(cache, monkeypatch):
+    monkeypatch.setattr(response_cache, "CACHE_OFFLINE", True)
+    with pytest.raises(response_cache.CacheMiss):
+        response_cache.fetch("GET", "https://x/oa", "oa", params={"id": "PMC1"})
+    assert cache == []
+
+def test_expired_entry_is_refetched(cache, monkeypatch):
+    monkeypatch.setitem(response_cache.CACHE_TTL, "esearch", -1)
+    response_cache.fetch("GET", "https://x/esearch", "esearch", params={"term": "tavi"})
+    response_cache.fetch("GET", "https://x/esearch", "esearch", params={"term": "tavi"})
+    assert len(cache) == 2
+
+def test_hit_survives_entry_evicted_before_lru_touch(cache, monkeypatch):
+    response_cache.fetch("GET", "https://x/efetch", "efetch", params={"id": "7"})
+    def gone(*args, **kwargs):
+        raise FileNotFoundError("evicted")
+    monkeypatch.setattr(response_cache.os, "utime", gone)
+    assert response_cache.fetch("GET", "https://x/efetch", "efetch", params={"id": "7"}) == b"<xml>1</xml>"
@@ -0,0 +1,98 @@
+import threading
+
+import review_counts
+from review_counts import NavCounts, category_counts, count_buckets, _bucket
+
+DOCS = [
+    {"access": "Free"},
+    {"access": "Free", "status": "Pending", "approved_tags": ["TAVI"]},
+    {"access": "Paid", "status": "Pending"},
+    {"access": "Paid", "status": "approved", "approved_tags": ["TAVI"]},
+    {"access": "Free", "status": "rejected"},
+]
+
+
+class FakeArticles:
+    """Runs the $facet / $group pipeline count_buckets builds, in Python."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = 0
+
+    def aggregate(self, pipeline):
+        self.calls += 1
+        out = {}
+        for name, stages in pipeline[0]["$facet"].items():
+            docs = self.docs
+            if "$match" in stages[0]:
+                tag = stages[0]["$match"]["approved_tags"]
+                docs = [d for d in docs if tag in d.get("approved_tags", [])]
+            groups = {}
+            for d in docs:
+                key = tuple(sorted((k, d[k]) for k in ("status", "access") if k in d))
+                groups[key] = groups.get(key, 0) + 1
+            out[name] = [{"_id": dict(k), "n": n} for k, n in groups.items()]
+        return iter([out])
+
+
+def test_category_counts_match_the_index_queries():
+    all_buckets, tagged = count_buckets(FakeArticles(DOCS), "TAVI")
+    assert category_counts(all_buckets) == {
+        "pending": 3, "free": 1, "paid": 1, "approved": 1, "rejected": 1, "all": 5}
+    assert category_counts(tagged)["pending"] == 1
+    assert category_counts(tagged)["approved"] == 1
+
+
+def test_cache_serves_repeat_loads_and_tracks_review_actions():
+    coll = FakeArticles(DOCS)
+    cache = NavCounts(ttl=60)
+    cache.get(coll)
+    pills, tagged = cache.get(coll, "TAVI")
+    assert coll.calls == 2
+
+    cache.moved(DOCS[1], "approved")                      # approve a tagged pending article
+    cache.moved(DOCS[0], None)                            # undo on an unreviewed one: no change
+    cache.tag_added(DOCS[2], "TAVI")
+    pills, tagged = cache.get(coll, "TAVI")
+    assert coll.calls == 2
+    assert pills["pending"] == 2 and pills["free"] == 0 and pills["approved"] == 2
+    assert tagged["approved"] == 2 and tagged["paid"] == 1
+
+    cache.invalidate()
+    cache.get(coll)
+    assert coll.calls == 3
+
+
+def test_zero_ttl_counts_every_time():
+    coll = FakeArticles(DOCS)
+    cache = NavCounts(ttl=0)
+    cache.get(coll)
+    cache.get(coll)
+    assert coll.calls == 2
+    assert _bucket({}) != _bucket({"status": None})
+
+
+def test_moved_waits_until_get_has_read_the_buckets(monkeypatch):
+    coll = FakeArticles(DOCS)
+    cache = NavCounts(ttl=60)
+    cache.get(coll, "TAVI")
+    # a review POST on another thread, arriving while get() reads the buckets
+    mover = threading.Thread(target=cache.moved, args=(DOCS[1], "approved"))
+    blocked = []
+
+    def counts_while_moving(buckets):
+        if not mover.is_alive() and not blocked:
+            mover.start()
+        mover.join(0.1)
+        blocked.append(mover.is_alive())
+        return category_counts(buckets)
+
+    monkeypatch.setattr(review_counts, "category_counts", counts_while_moving)
+    pills, tagged = cache.get(coll, "TAVI")
+    mover.join()
+
+    assert blocked == [True, True]
+    assert pills["approved"] == 1 and tagged["approved"] == 1      # read before the move
+    monkeypatch.undo()
+    pills, tagged = cache.get(coll, "TAVI")
+    assert pills["approved"] == 2 and tagged["approved"] == 2
@@ -0,0 +1,81 @@
+import tag_utils
+from tag_utils import build_tag_source, suggest_tags, tag_key
+from article_stages import tag_article
+
+TEXT = ("Transcatheter aortic valve implantation outcomes in elderly patients "
+        "with severe aortic stenosis and permanent pacemaker implantation.")
+
+def test_build_tag_source_caps_full_text_tokens():
+    source = build_tag_source("Title", "Abstract", "one two\nthree four", max_tokens=3)
+    assert source == "Title Abstract one two\nthree"
+    assert build_tag_source("T", "A", "x y", max_tokens=0) == "T A x y"
+
+def test_suggest_tags_is_memoized(monkeypatch):
+    tag_utils.clear_tag_cache()
+    first = suggest_tags(TEXT, 5)
+    monkeypatch.setattr(tag_utils, "get_extractor", lambda: None)   # would crash if called
+    assert suggest_tags(TEXT, 5) == first
+    assert tag_key(TEXT, 5) != tag_key(TEXT, 10)
+
+def test_tag_article_reuses_stored_tags_when_input_unchanged():
+    details = {"title": "TAVI", "abstract": TEXT}
+    tags = tag_article(details, "")
+    existing = {"tag_key": details["tag_key"], "suggested_tags": ["stored"]}
+    assert tag_article(dict(details), "", existing) == ["stored"]
+    assert tag_article(dict(details), "new full text", existing) != ["stored"]
+
+def test_suggest_tags_batch_matches_single_calls_and_fans_out(monkeypatch):
+    import concurrent.futures
+    monkeypatch.setattr(tag_utils, "TAG_BATCH_PARALLEL_MIN", 1)
+    texts = [TEXT, "", "Mitral valve repair with transcatheter edge-to-edge devices.", TEXT]
+    tag_utils.clear_tag_cache()
+    single = [suggest_tags(t, 5) for t in texts]
+    tag_utils.clear_tag_cache()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as ex:
+        assert tag_utils.suggest_tags_batch(texts, 5, executor=ex, workers=2) == single
+    assert single[1] == []
+
+def test_executor_factory_only_called_when_batch_fans_out(monkeypatch):
+    import concurrent.futures
+    monkeypatch.setattr(tag_utils, "CPU_WORKERS", 2)
+    monkeypatch.setattr(tag_utils, "TAG_BATCH_PARALLEL_MIN", 3)
+    made = []
+    def factory():
+        made.append(concurrent.futures.ThreadPoolExecutor(max_workers=2))
+        return made[-1]
+    texts = ["Aortic valve sizing by CT.", "Mitral annulus calcification.",
+             "Tricuspid regurgitation outcomes."]
+    tag_utils.clear_tag_cache()
+    tag_utils.suggest_tags_batch(texts[:2], 5, executor=factory)
+    assert made == []
+    tag_utils.clear_tag_cache()
+    tag_utils.suggest_tags_batch(texts, 5, executor=factory)
+    assert len(made) == 1
+    made[0].shutdown()
+
+def test_batch_is_split_into_one_chunk_per_worker(monkeypatch):
+    monkeypatch.setattr(tag_utils, "TAG_BATCH_PARALLEL_MIN", 2)
+    monkeypatch.setattr(tag_utils, "_tag_docs", lambda docs, top_k: [[d] for d in docs])
+
+    class RecordingExecutor:             # any executor with map(), no private attributes
+        chunks = []
+
+        def map(self, fn, docs_list, top_ks):
+            self.chunks.extend(docs_list)
+            return [fn(docs, k) for docs, k in zip(docs_list, top_ks)]
+
+    tag_utils.clear_tag_cache()
+    ex = RecordingExecutor()
+    texts = [f"document {i}" for i in range(6)]
+    assert tag_utils.suggest_tags_batch(texts, 5, executor=ex, workers=3) == [[t] for t in texts]
+    assert [len(c) for c in ex.chunks] == [2, 2, 2]
+    tag_utils.clear_tag_cache()
+
+def test_tfidf_tag_key_changes_with_the_model(monkeypatch):
+    import tfidf_tags
+    model = tfidf_tags.TfidfModel(stopwords={"the"})
+    monkeypatch.setattr(tfidf_tags, "_model", model)
+    monkeypatch.setattr(tag_utils, "TAG_ENGINE", "tfidf")
+    before = tag_key("aortic valve")
+    model.partial_fit(["aortic valve"], ids=["1"])
+    assert tag_key("aortic valve") != before
@@ -0,0 +1,44 @@
+import numpy as np
+from tfidf_tags import TfidfModel
+
+STOP = {"the", "of", "in", "and", "with", "a"}
+DOCS = [
+    "Aortic stenosis in the elderly. Outcomes of valve replacement.",
+    "Mitral regurgitation and valve repair outcomes.",
+    "Transcatheter aortic valve implantation with a balloon-expandable valve.",
+]
+
+def test_candidates_skip_stopword_edges_and_punctuation():
+    m = TfidfModel(stopwords=STOP)
+    cands = m.candidates("Quality of life, in TAVI patients")
+    assert "quality of life" in cands and "tavi patients" in cands
+    assert "life in" not in cands and "of life" not in cands
+
+def test_partial_fit_is_incremental_and_skips_seen_ids():
+    whole = TfidfModel(stopwords=STOP)
+    whole.partial_fit(DOCS, ids=["1", "2", "3"])
+    parts = TfidfModel(stopwords=STOP)
+    parts.partial_fit(DOCS[:2], ids=["1", "2"])
+    parts.partial_fit(DOCS[1:], ids=["2", "3"])          # "2" is not counted twice
+    assert parts.n_docs == whole.n_docs == 3
+    assert {t: parts.df[parts.vocab[t]] for t in whole.terms} == \
+           {t: whole.df[whole.vocab[t]] for t in whole.terms}
+
+def test_suggest_tags_prefers_distinctive_terms_and_round_trips(tmp_path):
+    m = TfidfModel(stopwords=STOP)
+    m.partial_fit(DOCS, ids=["1", "2", "3"])
+    tags = m.suggest_tags(["Mitral regurgitation. Mitral regurgitation and valve."], top_k=3)[0]
+    assert tags == ["mitral", "regurgitation", "valve"]     # "valve" is in every doc
+    path = str(tmp_path / "model.npz")
+    m.save(path)
+    loaded = TfidfModel.load(path)
+    assert loaded.terms == m.terms and loaded.ids == m.ids
+    assert np.array_equal(loaded.df, m.df)
+
+def test_suggest_tags_leaves_the_model_unchanged():
+    m = TfidfModel(stopwords=STOP)
+    m.partial_fit(DOCS, ids=["1", "2", "3"])
+    terms, df = list(m.terms), m.df.copy()
+    tags = m.suggest_tags(["Novel zebra giraffe. Aortic valve."], top_k=3)[0]
+    assert tags == ["aortic valve"]                      # unseen phrases are not candidates
+    assert m.terms == terms and np.array_equal(m.df, df) and m.n_docs == 3
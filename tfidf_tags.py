@@ -0,0 +1,238 @@
+"""
+tfidf_tags.py  ·  Corpus-level TF-IDF tag engine (TAG_ENGINE=tfidf)
+---------------------------------------------------------------------------
+YAKE scores every document on its own; this engine instead scores 1–3-gram
+candidates against document frequencies over the whole articles +
+article_text corpus, and tags whole batches with sparse-matrix operations
+(one scipy CSR matrix per batch, one multiply by the IDF vector).
+
+The vocabulary and document frequencies are kept in TFIDF_MODEL_PATH and
+updated incrementally: SciCom adds each run's articles after the run
+(update_from_db), skipping PubMed IDs already counted, so IDF never has to
+be rebuilt from scratch.  Tagging only reads the model: tags are drawn
+from the vocabulary of the documents counted so far, and n_docs is part of
+tag_utils.tag_key, so stored tags are recomputed once the IDF changes.
+Candidates follow YAKE's rules: no crossing punctuation, no leading/trailing
+stopword, no pure numbers, and the same stopword list.
+
+    python tfidf_tags.py              # (re)build the model from MongoDB
+"""
+
+import os
+import re
+import threading
+
+import numpy as np
+import scipy.sparse as sp
+
+from config import TFIDF_MODEL_PATH
+
+_MAX_NGRAM = 3
+_CHUNK = re.compile(r"[^.,;:!?()\[\]{}\"“”]+")          # no n-gram crosses these
+_WORD = re.compile(r"[a-z0-9][a-z0-9\-']*[a-z0-9]|[a-z]")
+
+def _stopwords():
+    from tag_utils import get_extractor            # share YAKE's English list
+    return frozenset(getattr(get_extractor(), "stopword_set", ()))
+
+
+class TfidfModel:
+    """Vocabulary + document frequencies; `ids` are the PubMed IDs counted."""
+
+    def __init__(self, terms=(), df=(), n_docs=0, ids=(), stopwords=None):
+        self.terms = list(terms)
+        self.vocab = {t: i for i, t in enumerate(self.terms)}
+        self.df = np.asarray(df, dtype=np.int64).copy()
+        self.df.resize(len(self.terms), refcheck=False)
+        self.n_docs = int(n_docs)
+        self.ids = set(ids)
+        self.stopwords = _stopwords() if stopwords is None else frozenset(stopwords)
+        self._lock = threading.Lock()
+
+    # ---- candidates ----
+    def candidates(self, text):
+        """1–3-gram candidate phrases of `text`, lowercased."""
+        stop = self.stopwords
+        out = []
+        for chunk in _CHUNK.findall(text.lower()):
+            words = _WORD.findall(chunk)
+            for i, first in enumerate(words):
+                if first in stop or first.isdigit():
+                    continue
+                for n in range(1, _MAX_NGRAM + 1):
+                    if i + n > len(words):
+                        break
+                    last = words[i + n - 1]
+                    if last in stop or last.isdigit():
+                        continue
+                    out.append(" ".join(words[i:i + n]))
+        return out
+
+    def _count_matrix(self, texts, grow=False):
+        """
+        CSR term-count matrix (docs × vocab).  Terms outside the vocabulary
+        are left out unless `grow` (partial_fit only), which adds them.
+        Candidates are computed before taking the lock; the caller must not
+        hold it.  Returns (X, idf) with idf a snapshot taken under the lock.
+        """
+        cands = [self.candidates(text or "") for text in texts]
+        indptr, indices = [0], []
+        with self._lock:
+            for terms in cands:
+                for term in terms:
+                    col = self.vocab.get(term)
+                    if col is None:
+                        if not grow:
+                            continue
+                        col = self.vocab[term] = len(self.terms)
+                        self.terms.append(term)
+                    indices.append(col)
+                indptr.append(len(indices))
+            n_terms = len(self.terms)
+            if len(self.df) < n_terms:
+                self.df.resize(n_terms, refcheck=False)
+            idf = self.idf(n_terms)
+        data = np.ones(len(indices), dtype=np.float64)
+        X = sp.csr_matrix((data, np.asarray(indices, dtype=np.int64), indptr),
+                          shape=(len(texts), n_terms))
+        X.sum_duplicates()                              # counts per (doc, term)
+        return X, idf
+
+    # ---- IDF ----
+    def partial_fit(self, texts, ids=None):
+        """Add documents to the DF counts; documents whose id was seen are skipped."""
+        if ids is not None:
+            pairs = [(i, t) for i, t in zip(ids, texts) if i not in self.ids]
+            ids, texts = [i for i, _ in pairs], [t for _, t in pairs]
+        if not texts:
+            return 0
+        X, _ = self._count_matrix(texts, grow=True)
+        with self._lock:
+            self.df[:X.shape[1]] += np.diff(X.tocsc().indptr)  # docs per term
+            self.n_docs += X.shape[0]
+            self.ids.update(ids or ())
+        return X.shape[0]
+
+    def idf(self, n_terms):
+        """IDF of the first `n_terms` terms (a new array; call with the lock held)."""
+        df = self.df[:n_terms]
+        return np.log((1.0 + self.n_docs) / (1.0 + df)) + 1.0
+
+    # ---- tagging ----
+    def suggest_tags(self, texts, top_k=10):
+        """
+        Top-`top_k` corpus-vocabulary phrases per text, by tf·idf, near-
+        duplicates dropped.  Read-only: phrases the corpus has never seen
+        are not candidates (they would all score the maximum IDF) and only
+        partial_fit adds them.
+        """
+        X, idf = self._count_matrix(texts)
+        W = X.multiply(idf).tocsr()
+        tags = []
+        for row in range(W.shape[0]):
+            lo, hi = W.indptr[row], W.indptr[row + 1]
+            scores, cols = W.data[lo:hi], W.indices[lo:hi]
+            picked = []
+            for j in np.argsort(-scores, kind="stable")[:top_k * 5]:
+                term = self.terms[cols[j]]
+                if any(term in p or p in term for p in picked):
+                    continue
+                picked.append(term)
+                if len(picked) == top_k:
+                    break
+            tags.append(picked)
+        return tags
+
+    # ---- persistence ----
+    def save(self, path=TFIDF_MODEL_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".part.npz"
+        with self._lock:
+            np.savez_compressed(tmp, terms=_pack(self.terms), df=self.df,
+                                n_docs=self.n_docs, ids=_pack(sorted(self.ids)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=TFIDF_MODEL_PATH):
+        with np.load(path) as f:
+            return cls(_unpack(f["terms"]), f["df"], int(f["n_docs"]), _unpack(f["ids"]))
+
+
+def _pack(strings):
+    """Newline-joined UTF-8 as a uint8 array (npz without pickled objects)."""
+    return np.frombuffer("\n".join(strings).encode("utf-8"), dtype=np.uint8)
+
+def _unpack(arr):
+    return bytes(arr).decode("utf-8").split("\n") if arr.size else []
+
+
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """The TF-IDF model from TFIDF_MODEL_PATH, loaded once per process."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                if os.path.exists(TFIDF_MODEL_PATH):
+                    _model = TfidfModel.load(TFIDF_MODEL_PATH)
+                else:
+                    print(f"⚠️ No TF-IDF model at {TFIDF_MODEL_PATH}; "
+                          f"run `python tfidf_tags.py` to build one")
+                    _model = TfidfModel()
+    return _model
+
+
+# -------------------- Corpus from MongoDB --------------------
+
+def _iter_corpus(db, query=None):
+    """Yield (pubmed_id, tag source) for articles matching `query`."""
+    from tag_utils import build_tag_source
+    cursor = db["articles"].find(query or {}, {"pubmed_id": 1, "title": 1, "abstract": 1, "_id": 0})
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) == 500:
+            yield from _with_text(db, batch, build_tag_source)
+            batch = []
+    if batch:
+        yield from _with_text(db, batch, build_tag_source)
+
+def _with_text(db, docs, build_tag_source):
+    texts = {
+        t["pubmed_id"]: t.get("full_text", "")
+        for t in db["article_text"].find(
+            {"pubmed_id": {"$in": [d["pubmed_id"] for d in docs]}},
+            {"pubmed_id": 1, "full_text": 1, "_id": 0})
+    }
+    for d in docs:
+        yield d["pubmed_id"], build_tag_source(d.get("title", ""), d.get("abstract", ""),
+                                               texts.get(d["pubmed_id"], ""))
+
+def update_from_db(db, pubmed_ids, model=None):
+    """Add the given articles to the model's IDF and save it; returns docs added."""
+    model = model or get_model()
+    pairs = list(_iter_corpus(db, {"pubmed_id": {"$in": list(pubmed_ids)}}))
+    added = model.partial_fit([t for _, t in pairs], [p for p, _ in pairs])
+    if added:
+        model.save()
+    return added
+
+def rebuild_from_db(db):
+    model = TfidfModel()
+    pairs = []
+    for pair in _iter_corpus(db):
+        pairs.append(pair)
+        if len(pairs) == 500:
+            model.partial_fit([t for _, t in pairs], [p for p, _ in pairs])
+            pairs = []
+    model.partial_fit([t for _, t in pairs], [p for p, _ in pairs])
+    model.save()
+    return model
+
+
+if __name__ == "__main__":
+    from db_utils import connect_to_mongo
+    m = rebuild_from_db(connect_to_mongo())
+    print(f"✅ TF-IDF model: {m.n_docs} documents, {len(m.terms)} terms → {TFIDF_MODEL_PATH}")
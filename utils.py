@@ -1,6 +1,7 @@
 import re
 import pandas as pd
-from config import KEYWORDS_CSV, ABBREVS_CSV
+import os
+from config import KEYWORDS_CSV, ABBREVS_CSV, PDF_DIR
 
 # -------------------- Utility Functions --------------------
 def sanitize_filename(s):
@@ -13,6 +14,27 @@ def sanitize_filename(s):
     return s
 
 
+def pdf_filename(updated_title):
+    """File name of an article's PDF, derived from its updated_title."""
+    pdf_name = sanitize_filename(updated_title) + ".pdf"
+    # --- truncate if Windows path would be too long (≤140 chars keeps path <260) ---
+    if len(pdf_name) > 140:
+        pdf_name = pdf_name[:140] + ".pdf"
+    return pdf_name
+
+
+def locate_pdf(pdf_file, pdf_dir=PDF_DIR):
+    """Path of a stored PDF in pdf_dir, or in approved/ / rejected/ once moved."""
+    name = os.path.basename(pdf_file or "")
+    if not name.lower().endswith(".pdf"):
+        return None
+    for folder in ("", "approved", "rejected"):
+        path = os.path.join(pdf_dir, folder, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
 def generate_citation(details):
     """
     Generate a citation string for a paid article: